@@ -1,8 +1,9 @@
-import csv
 import os
 from glob import glob
 from typing import Dict, List
 
+import pandas as pd
+
 DATA_DIR = os.path.dirname(__file__)
 OUTPUT_FILE = os.path.join(DATA_DIR, "combined_listings.csv")
 FIELDS = [
@@ -35,39 +36,50 @@ def merge_csv_files(
     ]
     paths.sort()
 
-    merged: Dict[str, Dict[str, str]] = {}
-
+    frames = []
     for path in paths:
-        with open(path, newline="", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                url = row.get("url")
-                if not url:
-                    continue
-                data = {field: row.get(field) for field in FIELDS}
-                if url in merged:
-                    existing = merged[url]
-                    new_fs = data.get("first_seen") or ""
-                    old_fs = existing.get("first_seen") or ""
-                    if new_fs and (not old_fs or new_fs < old_fs):
-                        merged[url] = data
-                else:
-                    merged[url] = data
+        try:
+            frames.append(
+                pd.read_csv(
+                    path,
+                    usecols=lambda c: c in FIELDS,
+                    dtype=str,
+                    keep_default_na=False,
+                    encoding="utf-8",
+                )
+            )
+        except pd.errors.EmptyDataError:
+            continue
 
-    merged_rows = list(merged.values())
+    df = pd.DataFrame(columns=FIELDS)
+    if frames:
+        df = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+        df = df.reindex(columns=FIELDS)
+        df = df[df["url"].notna() & (df["url"] != "")]
 
-    if not merged_rows:
+    if df.empty:
         print("No rows found to merge.")
         return []
 
+    # Keep the row with the earliest non-empty first_seen per URL (ties go to
+    # the first file read), while listing URLs in order of first appearance.
+    first_seen = df["first_seen"].mask(df["first_seen"] == "")
+    df = (
+        df.assign(_order=df.groupby("url", sort=False).ngroup(), _first_seen=first_seen)
+        .sort_values("_first_seen", kind="stable", na_position="last")
+        .drop_duplicates("url", keep="first")
+        .sort_values("_order", kind="stable")
+        .drop(columns=["_order", "_first_seen"])
+    )
+
     os.makedirs(os.path.dirname(output_file), exist_ok=True)
-    with open(output_file, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=FIELDS)
-        writer.writeheader()
-        writer.writerows(merged_rows)
+    df.to_csv(output_file, index=False, encoding="utf-8")
 
-    print(f"Merged {len(merged_rows)} rows from {len(paths)} files into {output_file}")
-    return merged_rows
+    print(f"Merged {len(df)} rows from {len(paths)} files into {output_file}")
+    # Only inputs missing a column leave NaNs; avoid copying the frame otherwise
+    if df.isna().to_numpy().any():
+        df = df.astype(object).where(df.notna(), None)
+    return df.to_dict("records")
 
 
 if __name__ == "__main__":
@@ -1,10 +1,16 @@
 #!/usr/bin/env python
-import os, sys, time, json, argparse, pathlib, datetime as dt
+import os, re, sys, time, json, argparse, pathlib, datetime as dt
 from typing import List, Dict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import pandas as pd
 from rich.table import Table
 from utils.console import console
 
+try:
+    import pyarrow as pa
+except ImportError:  # pragma: no cover - Parquet output falls back to CSV
+    pa = None  # type: ignore
+
 # Import your site scrapers (update names if different)
 import scrape_craigslist as cl
 import scrape_carscom as ccom
@@ -14,6 +20,9 @@ import config
 OUTPUT_DIR = pathlib.Path(os.getenv("OUTPUT_DIR", "./data/out"))
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
+# Currency/thousands/unit noise left in scraped price & mileage strings
+_NUM_NOISE_RE = re.compile(r"[$,\s]|mi(?:les)?\.?$", re.I)
+
 def canonical_url(u: str) -> str:
     from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
     s = urlsplit(u)
@@ -23,10 +32,19 @@ def canonical_url(u: str) -> str:
 def as_df(rows: List[Dict]) -> pd.DataFrame:
     if not rows: return pd.DataFrame()
     df = pd.DataFrame(rows)
-    if "url" in df: df["url"] = df["url"].map(canonical_url)
+    if "url" in df:
+        # Scrapers already strip queries/fragments, so only re-parse URLs that still carry one
+        dirty = df["url"].str.contains("[?#]", regex=True, na=False)
+        if dirty.any():
+            df.loc[dirty, "url"] = df.loc[dirty, "url"].map(canonical_url)
     for col in ("price","mileage"):
-        if col in df:
-            df[col] = pd.to_numeric(df[col], errors="coerce").astype("Int64")
+        if col not in df: continue
+        if pd.api.types.is_numeric_dtype(df[col]):
+            # Scrapers already emit ints/None; no per-element parsing needed
+            df[col] = df[col].astype("Int64")
+        else:
+            cleaned = df[col].astype("string").str.replace(_NUM_NOISE_RE, "", regex=True)
+            df[col] = pd.to_numeric(cleaned, errors="coerce").astype("Int64")
     if "source" in df: df["source"] = df["source"].astype("category")
     if "first_seen" not in df:
         df["first_seen"] = dt.datetime.utcnow().isoformat(timespec="seconds")
@@ -44,6 +62,22 @@ def dedupe(df: pd.DataFrame) -> pd.DataFrame:
         df = df.drop_duplicates("url", keep="first")
     return df
 
+def write_outputs(df: pd.DataFrame, stem: str, csv: bool, parquet: bool) -> pathlib.Path:
+    """Write ``df`` under OUTPUT_DIR as Parquet and/or CSV; return the primary path.
+
+    Parquet is the default output. CSV is written when asked for, or as the
+    fallback when Parquet is disabled or pyarrow isn't installed.
+    """
+    path = None
+    if parquet and pa is not None:
+        path = OUTPUT_DIR / f"{stem}.parquet"
+        df.to_parquet(path, index=False, engine="pyarrow", compression="zstd", row_group_size=50_000)
+    if csv or path is None:
+        csv_path = OUTPUT_DIR / f"{stem}.csv"
+        df.to_csv(csv_path, index=False)
+        path = path or csv_path
+    return path
+
 def scrape_site(site_name: str, fn) -> pd.DataFrame:
     console.print(f"→ {site_name}…", style="bold blue")
     try:
@@ -63,6 +97,7 @@ def main():
     ap.add_argument("--miles-max", type=int, default=int(os.getenv("MILEAGE_MAX","200000")))
     ap.add_argument("--pages", type=int, default=int(os.getenv("MAX_PAGES","8")))
     ap.add_argument("--sites", default="craigslist,carscom,cargurus")
+    ap.add_argument("--csv", action="store_true")
     ap.add_argument("--no-parquet", action="store_true")
     args = ap.parse_args()
 
@@ -75,26 +110,29 @@ def main():
         for k, v in settings.items():
             if hasattr(mod, k): setattr(mod, k, v)
 
-    dfs = []
-    for name, mod in [("craigslist", cl), ("carscom", ccom), ("cargurus", cg)]:
-        if name not in args.sites: continue
-        df = scrape_site(name, mod)
-        if not df.empty:
-            out_csv = OUTPUT_DIR / f"{name}.csv"
-            df.to_csv(out_csv, index=False)
-            if not args.no_parquet:
-                df.to_parquet(OUTPUT_DIR / f"{name}.parquet", index=False)
-            dfs.append(df)
+    sites = [(n, m) for n, m in [("craigslist", cl), ("carscom", ccom), ("cargurus", cg)] if n in args.sites]
+    # Sites are independent hosts, so scrape them side by side; each module still
+    # paces its own requests.  Per-site files are written as each site finishes.
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(len(sites), 1)) as ex:
+        futures = {ex.submit(scrape_site, name, mod): name for name, mod in sites}
+        for fut in as_completed(futures):
+            name, df = futures[fut], fut.result()
+            if not df.empty:
+                write_outputs(df, name, args.csv, not args.no_parquet)
+            results[name] = df
+    # Filter each site before combining so concat and dedupe only see kept rows;
+    # combine in site order so dedupe's keep="first" stays deterministic
+    dfs = [apply_filters(results[name], args.price_max, args.miles_max)
+           for name, _ in sites if not results[name].empty]
 
     if dfs:
-        combined = dedupe(pd.concat(dfs, ignore_index=True))
-        combined = apply_filters(combined, args.price_max, args.miles_max)
+        # A lone site frame needs no concat; dedupe below already returns a new frame
+        combined = dfs[0] if len(dfs) == 1 else pd.concat(dfs, ignore_index=True)
+        combined = dedupe(combined)
         combined.sort_values(["price","mileage"], na_position="last", inplace=True)
         ts = dt.datetime.utcnow().strftime("%Y%m%d-%H%M%S")
-        combined_csv = OUTPUT_DIR / f"combined-{ts}.csv"
-        combined.to_csv(combined_csv, index=False)
-        if not args.no_parquet:
-            combined.to_parquet(OUTPUT_DIR / f"combined-{ts}.parquet", index=False)
+        combined_out = write_outputs(combined, f"combined-{ts}", args.csv, not args.no_parquet)
 
         source_counts = combined.groupby("source")["url"].count()
         table = Table(title="Summary")
@@ -103,7 +141,7 @@ def main():
         for source, count in source_counts.items():
             table.add_row(source, str(count))
         console.print(table)
-        console.print(f"Combined: {len(combined)} rows → {combined_csv}", style="bold")
+        console.print(f"Combined: {len(combined)} rows → {combined_out}", style="bold")
     else:
         console.print("No data scraped.", style="yellow")
 
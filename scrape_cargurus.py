@@ -1,21 +1,29 @@
-import csv
 import json
 import os
-import random
-import time
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple, Union
 from urllib.parse import urlencode, urljoin
 
 import requests
-from bs4 import BeautifulSoup
+from lxml import etree
+from lxml import html as lxml_html
 
-from utils.throttle import polite_sleep
+try:
+    import orjson
+except ImportError:  # pragma: no cover - fall back to the stdlib parser
+    orjson = None  # type: ignore
+
+from utils.throttle import RateLimiter
 
 from utils.url import canonical_url
+from utils.csv_writer import write_csv
+from utils.parsing import HTML_PARSER, YEAR_RE, clean_number, element_text, first_match
 
 import config
-from utils.http_client import make_session
+from utils.http_client import ACCEPT_ENCODING, make_session
 from utils.console import console
 from functools import partial
 
@@ -25,7 +33,7 @@ BASE_URL = "https://www.cargurus.com/Cars/inventorylisting/viewDetailsFilterView
 HEADERS = {
     "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8",
     "Accept-Language": "en-US,en;q=0.9",
-    "Accept-Encoding": "gzip, deflate, br",
+    "Accept-Encoding": ACCEPT_ENCODING,
     "Referer": "https://www.cargurus.com/",
     "Connection": "keep-alive",
 }
@@ -36,6 +44,44 @@ MAX_PAGES = int(os.getenv("CARGURUS_MAX_PAGES", "9999"))
 # Polite delay range between page requests (seconds) for cargurus.com
 PAGE_DELAY_RANGE: Tuple[float, float] = (2.0, 6.0)
 REQUEST_TIMEOUT = int(os.getenv("CARGURUS_TIMEOUT", "45"))
+# Number of result pages fetched concurrently per batch
+MAX_WORKERS = int(os.getenv("CARGURUS_WORKERS", "4"))
+# On-disk response cache used when REQUESTS_CACHE is set
+CACHE_NAME = os.path.join(OUTPUT_DIR, "cache", "cargurus")
+CACHE_EXPIRE_AFTER = int(os.getenv("CARGURUS_CACHE_TTL", "3600"))
+
+# Inline <script> bodies, scanned on the raw response bytes
+_SCRIPT_RE = re.compile(rb"<script[^>]*>(.*?)</script>", re.S | re.I)
+# Cheap prefilter: a listings blob must contain one of the keys that
+# _find_listings_in_data looks for, so skip json.loads on anything else
+_LISTING_KEY_RE = re.compile(rb'"(?:price|mileage|canonicalUrl|title|name)"')
+# orjson parses the (often large) embedded blob straight from bytes; its
+# JSONDecodeError subclasses json.JSONDecodeError
+_json_loads = orjson.loads if orjson else json.loads
+# Keys that usually hold the listings array in the embedded blob
+_CANDIDATE_KEYS = ("listings", "results", "inventoryListings")
+# Fields that mark a list of dicts as listings
+_LISTING_KEYS = frozenset({"price", "mileage", "canonicalUrl", "title", "name"})
+
+# Listing-card selectors, compiled once.  Field queries return only the first
+# match in document order, mirroring ``select_one``.
+_CARDS_XPATH = etree.XPath(
+    "//*[@data-test='inventory-listing' or @data-cg-ft='inventory-listing'"
+    " or (self::div and @data-listingid)]"
+)
+_LINK_XPATH = etree.XPath("(.//a[@data-test='listing-link' or @itemprop='url' or @href])[1]")
+_PRICE_XPATH = etree.XPath(
+    "(.//*[@data-test='listing-price' or @itemprop='price' or @data-cg-ft='listing-price'])[1]"
+)
+_MILEAGE_XPATH = etree.XPath(
+    "(.//*[@data-test='mileage' or @data-test='listing-mileage' or @itemprop='mileage'])[1]"
+)
+_DEALER_XPATH = etree.XPath(
+    "(.//*[@data-test='dealer-name' or @itemprop='seller' or @data-cg-ft='dealer-name'])[1]"
+)
+_LOCATION_XPATH = etree.XPath(
+    "(.//*[@data-test='dealer-address' or @data-test='listing-location' or @itemprop='address'])[1]"
+)
 
 
 def build_search_url(page: int) -> str:
@@ -51,32 +97,25 @@ def build_search_url(page: int) -> str:
     return f"{BASE_URL}?{urlencode(params)}"
 
 
-def clean_number(text: Optional[str]) -> Optional[int]:
-    if not text:
-        return None
-    digits = "".join(ch for ch in text if ch.isdigit())
-    return int(digits) if digits else None
-
-
-
-
 def _find_listings_in_data(data: Any) -> Optional[List[Dict[str, Any]]]:
-    """Recursively search for a list of listing-like dictionaries."""
-    if isinstance(data, list):
-        if data and all(isinstance(x, dict) for x in data):
-            sample = data[0]
+    """Depth-first search for a list of listing-like dictionaries."""
+    stack: List[Any] = [data]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
             # Heuristic: listings typically include a price or mileage field
-            if any(k in sample for k in ("price", "mileage", "canonicalUrl", "title", "name")):
-                return data  # type: ignore[return-value]
-        for item in data:
-            found = _find_listings_in_data(item)
-            if found:
-                return found
-    elif isinstance(data, dict):
-        for v in data.values():
-            found = _find_listings_in_data(v)
-            if found:
-                return found
+            if (
+                node
+                and isinstance(node[0], dict)
+                and not _LISTING_KEYS.isdisjoint(node[0])
+                and all(isinstance(x, dict) for x in node)
+            ):
+                return node
+            stack.extend(reversed(node))
+        elif isinstance(node, dict):
+            stack.extend(v for k, v in reversed(node.items()) if k not in _CANDIDATE_KEYS)
+            # Pushed last so the likely listings arrays are searched first
+            stack.extend(node[k] for k in reversed(_CANDIDATE_KEYS) if k in node)
     return None
 
 
@@ -126,23 +165,24 @@ def _row_from_item(item: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
-def parse_listings(html: str) -> List[Dict]:
-    soup = BeautifulSoup(html, "lxml")
+def parse_listings(html: Union[str, bytes]) -> List[Dict]:
     results: List[Dict] = []
-
-    # Attempt to find JSON data embedded in script tags
-    for script in soup.find_all("script"):
-        text = script.string or ""
-        if "{" not in text:
+    raw = html.encode("utf-8") if isinstance(html, str) else html
+    if not raw or not raw.strip():
+        return results
+
+    # Attempt to find JSON data embedded in script tags without building a tree
+    for match in _SCRIPT_RE.finditer(raw):
+        candidate = match.group(1).strip()
+        if b"{" not in candidate or not _LISTING_KEY_RE.search(candidate):
             continue
-        candidate = text.strip()
-        if "=" in candidate and not candidate.strip().startswith("{"):
+        if b"=" in candidate and not candidate.startswith(b"{"):
             # e.g., window.__DATA__ = {...};
-            candidate = candidate.split("=", 1)[1].strip()
-        candidate = candidate.strip(";\n ")
+            candidate = candidate.partition(b"=")[2].strip()
+        candidate = candidate.strip(b";\n ")
         try:
-            data = json.loads(candidate)
-        except json.JSONDecodeError:
+            data = _json_loads(candidate)
+        except (json.JSONDecodeError, UnicodeDecodeError):
             continue
         listings = _find_listings_in_data(data)
         if listings:
@@ -157,42 +197,22 @@ def parse_listings(html: str) -> List[Dict]:
                 return results
 
     # Fallback to parsing visible HTML cards
-    cards = soup.select(
-        "[data-test='inventory-listing'], [data-cg-ft='inventory-listing'], div[data-listingid]"
-    )
-
-    for card in cards:
-        link = card.select_one("a[data-test='listing-link'], a[itemprop='url'], a[href]")
-        href_val = link.get("href") if link else None
-        if isinstance(href_val, list):
-            href_val = href_val[0] if href_val else None
-        href = href_val if isinstance(href_val, str) else None
+    try:
+        root = lxml_html.fromstring(raw, parser=HTML_PARSER)
+    except etree.ParserError:
+        # Nothing but whitespace/comments
+        return results
+    for card in _CARDS_XPATH(root):
+        link = first_match(_LINK_XPATH, card)
+        href = link.get("href") if link is not None else None
         url = urljoin("https://www.cargurus.com", href) if href else None
         url = canonical_url(url) if url else None
 
-        title = link.get_text(strip=True) if link else None
-
-        price_el = card.select_one(
-            "[data-test='listing-price'], [itemprop='price'], [data-cg-ft='listing-price']"
-        )
-        price_text = price_el.get_text(strip=True) if price_el else None
-        price = clean_number(price_text)
-
-        mileage_el = card.select_one(
-            "[data-test='mileage'], [data-test='listing-mileage'], [itemprop='mileage']"
-        )
-        mileage_text = mileage_el.get_text(strip=True) if mileage_el else None
-        mileage = clean_number(mileage_text)
-
-        dealer_el = card.select_one(
-            "[data-test='dealer-name'], [itemprop='seller'], [data-cg-ft='dealer-name']"
-        )
-        dealer = dealer_el.get_text(strip=True) if dealer_el else None
-
-        location_el = card.select_one(
-            "[data-test='dealer-address'], [data-test='listing-location'], [itemprop='address']"
-        )
-        location = location_el.get_text(strip=True) if location_el else None
+        title = element_text(link)
+        price = clean_number(element_text(first_match(_PRICE_XPATH, card)))
+        mileage = clean_number(element_text(first_match(_MILEAGE_XPATH, card)))
+        dealer = element_text(first_match(_DEALER_XPATH, card))
+        location = element_text(first_match(_LOCATION_XPATH, card))
 
         if not url and not title:
             continue
@@ -215,73 +235,90 @@ def parse_listings(html: str) -> List[Dict]:
 
 def filter_by_config(rows: List[Dict]) -> List[Dict]:
     filtered: List[Dict] = []
+    price_max = int(config.PRICE_MAX)
+    mileage_max = int(config.MILEAGE_MAX)
+    year_min = int(config.YEAR_MIN)
     for r in rows:
-        if r.get("price") is not None and r["price"] > int(config.PRICE_MAX):
+        if r.get("price") is not None and r["price"] > price_max:
             continue
-        if r.get("mileage") is not None and r["mileage"] > int(config.MILEAGE_MAX):
+        if r.get("mileage") is not None and r["mileage"] > mileage_max:
             continue
-        title = r.get("title") or ""
-        year_ok = True
-        year_digits = "".join(ch for ch in title[:4] if ch.isdigit())
-        if len(year_digits) == 4:
-            try:
-                if int(year_digits) < int(config.YEAR_MIN):
-                    year_ok = False
-            except ValueError:
-                pass
-        if not year_ok:
+        m = YEAR_RE.match(r.get("title") or "")
+        if m and int(m.group()) < year_min:
             continue
         filtered.append(r)
     return filtered
 
 
-def write_csv(rows: List[Dict], path: str) -> None:
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    fieldnames = [
-        "source",
-        "title",
-        "price",
-        "mileage",
-        "dealer",
-        "location",
-        "url",
-        "first_seen",
-    ]
-    with open(path, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        for r in rows:
-            writer.writerow(r)
+def _get_cached(session: requests.Session, url: str) -> Optional[requests.Response]:
+    """Return a fresh cached response for ``url`` without touching the network, if any."""
+    if getattr(session, "cache", None) is None:
+        return None
+    # requests-cache answers a miss or an expired entry with a synthetic 504
+    resp = session.get(url, timeout=REQUEST_TIMEOUT, only_if_cached=True)
+    return resp if resp.status_code != 504 else None
+
+
+def _fetch_page(
+    session: requests.Session, page: int, limiter: RateLimiter, stop: threading.Event
+) -> Optional[List[Dict]]:
+    """Fetch and parse one results page once the limiter allows it.
+
+    Cache hits skip the limiter, since they never reach the site.  Returns the
+    page's rows, or ``None`` on failure or once ``stop`` is set.
+    """
+    url = build_search_url(page)
+    try:
+        resp = _get_cached(session, url)
+        if resp is None:
+            limiter.wait(stop)
+            # Pagination may have ended while this worker waited for its slot
+            if stop.is_set():
+                return None
+            print(f"[cargurus] Fetching page {page}: {url}")
+            resp = session.get(url, timeout=REQUEST_TIMEOUT)
+    except requests.RequestException as e:
+        print(f"[cargurus] Request error on page {page}: {e}")
+        return None
+
+    if resp.status_code != 200:
+        print(f"[cargurus] HTTP {resp.status_code} on page {page}; stopping.")
+        return None
+
+    return parse_listings(resp.content)
 
 
 def scrape() -> List[Dict]:
     all_rows: List[Dict] = []
-    use_cache = os.getenv("REQUESTS_CACHE", "0") not in ("0", "false", "False")
-    session = make_session(use_cache=use_cache)
+    session = make_session(
+        pool_size=MAX_WORKERS,
+        cache_name=CACHE_NAME,
+        expire_after=CACHE_EXPIRE_AFTER,
+    )
     session.headers.update(HEADERS)
 
-    for page in range(1, MAX_PAGES + 1):
-        url = build_search_url(page)
-        print(f"[cargurus] Fetching page {page}: {url}")
-        try:
-            resp = session.get(url, timeout=REQUEST_TIMEOUT)
-        except requests.RequestException as e:
-            print(f"[cargurus] Request error on page {page}: {e}")
-            break
-
-        if resp.status_code != 200:
-            print(f"[cargurus] HTTP {resp.status_code} on page {page}; stopping.")
-            break
-
-        page_rows = parse_listings(resp.text)
-        if not page_rows:
-            print(f"[cargurus] No results found on page {page}; stopping.")
-            break
-
-        print(f"[cargurus] Parsed {len(page_rows)} listings from page {page}.")
-        all_rows.extend(page_rows)
-
-        polite_sleep(PAGE_DELAY_RANGE)
+    # Workers share one politeness budget: request starts stay PAGE_DELAY_RANGE
+    # apart, as in a serial run, while downloads and parsing overlap the waits
+    limiter = RateLimiter(PAGE_DELAY_RANGE)
+    stop = threading.Event()
+    page = 1
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        while page <= MAX_PAGES and not stop.is_set():
+            batch = range(page, min(page + MAX_WORKERS, MAX_PAGES + 1))
+            futures = [executor.submit(_fetch_page, session, p, limiter, stop) for p in batch]
+            # Consume in page order so the first failed or empty page ends pagination
+            for p, future in zip(batch, futures):
+                page_rows = future.result()
+                if page_rows is None:
+                    stop.set()
+                    break
+                if not page_rows:
+                    print(f"[cargurus] No results found on page {p}; stopping.")
+                    stop.set()
+                    break
+                print(f"[cargurus] Parsed {len(page_rows)} listings from page {p}.")
+                all_rows.extend(page_rows)
+            page += len(batch)
 
     return all_rows
 
@@ -1,14 +1,24 @@
-import csv
 import os
 import random
+import shelve
+import threading
 import time
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, MutableMapping, Optional, Tuple, Union
 from urllib.parse import urlencode, urljoin
-import statistics
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 
+import numpy as np
 import requests
-from bs4 import BeautifulSoup
+from lxml import etree
+from lxml import html as lxml_html
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - Parquet output is optional
+    pa = None  # type: ignore
 
 # New imports for Selenium fallback
 from selenium import webdriver
@@ -23,22 +33,25 @@ from selenium.webdriver.edge.service import Service as EdgeService
 from webdriver_manager.microsoft import EdgeChromiumDriverManager
 from selenium.webdriver.remote.webdriver import WebDriver as SeleniumWebDriver
 
-from utils.url import canonical_url
-from utils.throttle import polite_sleep
+from utils.url import canonical_url, is_canonical
+from utils.csv_writer import append_csv, open_csv, write_csv
+from utils.parsing import HTML_PARSER, YEAR_RE, clean_number, element_text, has_class
+from utils.throttle import RateLimiter
 
 import config
-from utils.http_client import USER_AGENTS, make_session
+from utils.http_client import ACCEPT_ENCODING, USER_AGENTS, cache_enabled_from_env, make_session
 from utils.console import console
 from functools import partial
 
 print = partial(console.print, style="green", markup=False)
 
-BASE_URL = "https://www.cars.com/shopping/results/"
+SITE_ROOT = "https://www.cars.com"
+BASE_URL = f"{SITE_ROOT}/shopping/results/"
 HEADERS = {
     "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8",
     "Accept-Language": "en-US,en;q=0.9",
-    # Keep encoding realistic but avoid br to not require brotli locally
-    "Accept-Encoding": "gzip, deflate",
+    # Brotli only when a decoder is installed (``pip install car-scraping[fast]``)
+    "Accept-Encoding": ACCEPT_ENCODING,
     "Referer": "https://www.cars.com/",
     "Connection": "keep-alive",
     "Upgrade-Insecure-Requests": "1",
@@ -57,6 +70,9 @@ HEADERS = {
 
 OUTPUT_DIR = "data"
 OUTPUT_FILE = os.path.join(OUTPUT_DIR, "carscom_results.csv")
+PARQUET_FILE = os.path.join(OUTPUT_DIR, "carscom_results.parquet")
+# "csv" (default) or "parquet"; Parquet needs pyarrow
+OUTPUT_FORMAT = os.getenv("CARS_OUTPUT_FORMAT", "csv").lower()
 # High default so we capture all pages unless overridden via env
 MAX_PAGES = int(os.getenv("CARS_MAX_PAGES", "9999"))
 # Polite delay range between page requests (seconds) for cars.com
@@ -68,29 +84,55 @@ AUTO_SELENIUM_ON_FAIL = os.getenv("AUTO_SELENIUM_ON_FAIL", "1") not in ("0", "fa
 SELENIUM_WAIT = int(os.getenv("CARS_SELENIUM_WAIT", "12"))
 PAGE_SIZE = int(os.getenv("CARS_PAGE_SIZE", "50"))
 BROWSER = os.getenv("BROWSER", "auto").lower()  # 'chrome', 'edge', or 'auto'
-
-
-def build_search_url(page: int) -> str:
+# Number of result pages fetched concurrently in requests mode
+MAX_WORKERS = int(os.getenv("CARS_WORKERS", "4"))
+# On-disk response cache, opt-in via REQUESTS_CACHE like the other scrapers
+USE_CACHE = cache_enabled_from_env()
+CACHE_NAME = os.path.join(OUTPUT_DIR, "cache", "carscom")
+# Pages rendered by Selenium are kept separately, keyed on URL
+SELENIUM_CACHE_NAME = os.path.join(OUTPUT_DIR, "cache", "carscom_selenium")
+CACHE_EXPIRE_AFTER = int(os.getenv("CARS_CACHE_TTL", "600"))
+
+
+# Listing cards, compiled once
+_CARDS_XPATH = etree.XPath(f"//*[{has_class('vehicle-card')}]")
+# Every element inside a card that could supply a field, in document order.
+# _card_fields() walks this once per card instead of running one query per
+# field; it is a superset of the per-field selectors below.
+_FIELDS_XPATH = etree.XPath(
+    ".//*[self::h2"
+    f" or self::a[{has_class('vehicle-card-link')} or contains(@href, '/vehicledetail/')]"
+    f" or {has_class('primary-price')} or {has_class('mileage')} or {has_class('dealer-name')}"
+    f" or {has_class('dealer-name__location')} or {has_class('vehicle-card-location')}"
+    " or @data-test]"
+)
+# Field selectors as [classes], [data-test values]
+_PRICE_SEL = ({"primary-price"}, {"vehicleCardPricingBlockPrice"})
+_MILEAGE_SEL = ({"mileage"}, {"vehicleMileage"})
+_DEALER_SEL = ({"dealer-name"}, {"vehicleCardDealerInfo"})
+_LOCATION_SEL = ({"dealer-name__location", "vehicle-card-location"}, {"vehicleCardLocation"})
+
+
+@lru_cache(maxsize=8)
+def _search_url_prefix(radius, zip_code, price_max, mileage_max, year_min) -> str:
+    """Results URL up to the page number, built once per distinct set of filters."""
     params = {
         "stock_type": "used",
-        "maximum_distance": config.RADIUS_MILES,
-        "zip": config.ZIP_CODE,
-        "list_price_max": config.PRICE_MAX,
-        "mileage_max": config.MILEAGE_MAX,
-        "year_min": config.YEAR_MIN,
-        "page": page,
-        "page_size": PAGE_SIZE,
+        "maximum_distance": radius,
+        "zip": zip_code,
+        "list_price_max": price_max,
+        "mileage_max": mileage_max,
+        "year_min": year_min,
     }
     return f"{BASE_URL}?{urlencode(params)}"
 
 
-def clean_number(text: Optional[str]) -> Optional[int]:
-    if not text:
-        return None
-    digits = "".join(ch for ch in text if ch.isdigit())
-    return int(digits) if digits else None
-
-
+def build_search_url(page: int) -> str:
+    # Keyed on the live config values, which run_all may change after import
+    prefix = _search_url_prefix(
+        config.RADIUS_MILES, config.ZIP_CODE, config.PRICE_MAX, config.MILEAGE_MAX, config.YEAR_MIN
+    )
+    return f"{prefix}&page={page}&page_size={PAGE_SIZE}"
 
 
 def _locate_chrome_windows() -> Optional[str]:
@@ -130,6 +172,37 @@ def _locate_edge_windows() -> Optional[str]:
     return None
 
 
+@lru_cache(maxsize=None)
+def _chromedriver_path() -> str:
+    """Resolve (and if needed download) chromedriver once per process."""
+    return ChromeDriverManager().install()
+
+
+@lru_cache(maxsize=None)
+def _edgedriver_path() -> str:
+    """Resolve (and if needed download) msedgedriver once per process."""
+    return EdgeChromiumDriverManager().install()
+
+
+# Results are in the DOM once it is parsed; images are never read
+_PAGE_LOAD_STRATEGY = "eager"
+_BROWSER_PREFS = {"profile.managed_default_content_settings.images": 2}
+# Requests the browser never needs to render the result cards
+_BLOCKED_URL_PATTERNS = [
+    "*.png", "*.jpg", "*.jpeg", "*.webp", "*.gif", "*.svg", "*.mp4", "*.woff*",
+    "*googletagmanager*", "*google-analytics*", "*doubleclick*", "*facebook*",
+]
+
+
+def _block_heavy_requests(driver: SeleniumWebDriver) -> None:
+    """Have Chromium (Chrome or Edge) drop image, font, video and tracker requests via CDP."""
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": _BLOCKED_URL_PATTERNS})
+    except Exception:
+        pass  # best-effort; pages still load, just slower
+
+
 def make_driver() -> SeleniumWebDriver:
     # If user explicitly wants Edge
     if BROWSER == "edge":
@@ -144,14 +217,18 @@ def make_driver() -> SeleniumWebDriver:
         eopts.add_argument("--silent")
         eopts.add_argument("--enable-unsafe-swiftshader")
         eopts.add_argument(f"--user-agent={random.choice(USER_AGENTS)}")
+        eopts.add_argument("--blink-settings=imagesEnabled=false")
+        eopts.page_load_strategy = _PAGE_LOAD_STRATEGY
+        eopts.add_experimental_option("prefs", _BROWSER_PREFS)  # type: ignore[arg-type]
         if edge_binary:
             eopts.binary_location = edge_binary
         try:
             # Silence EdgeDriver logs
-            eservice = EdgeService(EdgeChromiumDriverManager().install(), log_path=os.devnull)
+            eservice = EdgeService(_edgedriver_path(), log_path=os.devnull)
             driver = webdriver.Edge(service=eservice, options=eopts)
         except Exception:
             driver = webdriver.Edge(options=eopts)
+        _block_heavy_requests(driver)
         try:
             driver.set_page_load_timeout(REQUEST_TIMEOUT)
         except Exception:
@@ -168,6 +245,9 @@ def make_driver() -> SeleniumWebDriver:
     opts.add_argument("--silent")
     opts.add_argument("--enable-unsafe-swiftshader")
     opts.add_argument(f"--user-agent={random.choice(USER_AGENTS)}")
+    opts.add_argument("--blink-settings=imagesEnabled=false")
+    opts.page_load_strategy = _PAGE_LOAD_STRATEGY
+    opts.add_experimental_option("prefs", _BROWSER_PREFS)  # type: ignore[arg-type]
     # Reduce obvious automation signals
     opts.add_experimental_option("excludeSwitches", ["enable-automation", "enable-logging"])  # type: ignore[arg-type]
     opts.add_experimental_option("useAutomationExtension", False)  # type: ignore[arg-type]
@@ -187,7 +267,7 @@ def make_driver() -> SeleniumWebDriver:
     except Exception:
         # Fallback to webdriver-manager if needed and silence chromedriver logs
         try:
-            service = ChromeService(ChromeDriverManager().install(), log_path=os.devnull)
+            service = ChromeService(_chromedriver_path(), log_path=os.devnull)
             driver = webdriver.Chrome(service=service, options=opts)
         except TypeError:
             driver = webdriver.Chrome(options=opts)
@@ -198,27 +278,33 @@ def make_driver() -> SeleniumWebDriver:
         })
     except Exception:
         pass
+    _block_heavy_requests(driver)
     driver.set_page_load_timeout(REQUEST_TIMEOUT)
     return driver
 
 
+# Phrases from interstitial bot-check / block pages, lowercase
+_BOT_SIGNALS = (
+    "are you a human",
+    "verify you are human",
+    "checking your browser",
+    "please enable javascript",
+    "captcha",
+    "access denied",
+    "request blocked",
+    "attention required",
+    "cf-chl-",
+    "just a moment",
+)
+
+
 def looks_like_bot_check(html: Optional[str]) -> bool:
     if not html:
         return False
+    # One lower() plus plain substring scans beats a case-insensitive regex
+    # alternation several times over on multi-MB pages
     text = html.lower()
-    signals = [
-        "are you a human",
-        "verify you are human",
-        "checking your browser",
-        "please enable javascript",
-        "captcha",
-        "access denied",
-        "request blocked",
-        "attention required",
-        "cf-chl-",
-        "just a moment",
-    ]
-    return any(s in text for s in signals)
+    return any(s in text for s in _BOT_SIGNALS)
 
 
 def is_partial_matches(html: Optional[str]) -> bool:
@@ -237,44 +323,75 @@ def is_partial_matches(html: Optional[str]) -> bool:
     )
 
 
-def parse_listings(html: str) -> List[Dict]:
-    soup = BeautifulSoup(html, "lxml")
-    cards = soup.select(".vehicle-card, article.vehicle-card")
+def _absurl(href: str) -> str:
+    """Resolve ``href`` against cars.com, skipping urljoin for plain site paths."""
+    if href.startswith("/") and not href.startswith("//") and "/." not in href:
+        return SITE_ROOT + href
+    return urljoin(SITE_ROOT, href)
+
+
+def _card_fields(card: Any) -> Tuple[Any, Any, Any, Any, Any, Any]:
+    """Return the (link, title, price, mileage, dealer, location) elements of ``card``.
+
+    Each field is the first match in document order, as ``select_one`` would
+    return for::
+
+        link      a.vehicle-card-link, a[href*="/vehicledetail/"]
+        title     h2, a.vehicle-card-link
+        price     .primary-price, [data-test='vehicleCardPricingBlockPrice']
+        mileage   .mileage, [data-test='vehicleMileage']
+        dealer    .dealer-name, [data-test='vehicleCardDealerInfo']
+        location  .dealer-name__location, .vehicle-card-location, [data-test='vehicleCardLocation']
+    """
+    link = title = None
+    found: List[Any] = [None, None, None, None]
+    sels = (_PRICE_SEL, _MILEAGE_SEL, _DEALER_SEL, _LOCATION_SEL)
+    for el in _FIELDS_XPATH(card):
+        cls = el.get("class")
+        classes = set(cls.split()) if cls else set()
+        if el.tag == "a":
+            card_link = "vehicle-card-link" in classes
+            if link is None and (card_link or "/vehicledetail/" in (el.get("href") or "")):
+                link = el
+            if title is None and card_link:
+                title = el
+        elif title is None and el.tag == "h2":
+            title = el
+        test = el.get("data-test")
+        for i, (sel_classes, sel_tests) in enumerate(sels):
+            if found[i] is None and (test in sel_tests or not classes.isdisjoint(sel_classes)):
+                found[i] = el
+    return (link, title, *found)
+
+
+def parse_listings(html: Union[str, bytes]) -> List[Dict]:
     results: List[Dict] = []
+    raw = html.encode("utf-8") if isinstance(html, str) else html
+    if not raw or not raw.strip():
+        return results
+    try:
+        root = lxml_html.fromstring(raw, parser=HTML_PARSER)
+    except etree.ParserError:  # e.g. a document that is only a comment
+        return results
     seen_urls = set()
 
-    for card in cards:
+    for card in _CARDS_XPATH(root):
+        link_el, title_el, price_el, mileage_el, dealer_el, location_el = _card_fields(card)
+
         # URL
-        link = card.select_one('a.vehicle-card-link, a[href*="/vehicledetail/"]')
-        href_val = link.get("href") if link else None
-        if isinstance(href_val, list):
-            href_val = href_val[0] if href_val else None
-        href = href_val if isinstance(href_val, str) else None
-        url = urljoin("https://www.cars.com", href) if href else None
-        url = canonical_url(url) if url else None
-
-        # Title
-        title_el = card.select_one("h2, a.vehicle-card-link")
-        title = title_el.get_text(strip=True) if title_el else None
-
-        # Price
-        price_el = card.select_one(".primary-price, [data-test='vehicleCardPricingBlockPrice']")
-        price_text = price_el.get_text(strip=True) if price_el else None
-        price = clean_number(price_text)
-
-        # Mileage
-        mileage_el = card.select_one(".mileage, [data-test='vehicleMileage']")
-        mileage_text = mileage_el.get_text(strip=True) if mileage_el else None
-        mileage = clean_number(mileage_text)
+        href = link_el.get("href") if link_el is not None else None
+        url = _absurl(href) if href else None
+        # Listing links are usually already clean; only reparse ones with a query/fragment
+        if url and not is_canonical(url):
+            url = canonical_url(url)
 
-        # Dealer / Location (best-effort)
-        dealer_el = card.select_one(".dealer-name, [data-test='vehicleCardDealerInfo']")
-        dealer = dealer_el.get_text(" ", strip=True) if dealer_el else None
+        title = element_text(title_el)
+        price = clean_number(element_text(price_el))
+        mileage = clean_number(element_text(mileage_el))
 
-        location_el = card.select_one(
-            ".dealer-name__location, .vehicle-card-location, [data-test='vehicleCardLocation']"
-        )
-        location = location_el.get_text(" ", strip=True) if location_el else None
+        # Dealer / Location (best-effort)
+        dealer = element_text(dealer_el, " ")
+        location = element_text(location_el, " ")
 
         if not url and not title:
             continue
@@ -305,22 +422,6 @@ def parse_listings(html: str) -> List[Dict]:
     return results
 
 
-def dedupe_rows(rows: List[Dict]) -> List[Dict]:
-    """Remove duplicate listings across pages by URL, keeping first occurrence."""
-    seen: set = set()
-    out: List[Dict] = []
-    for r in rows:
-        u = r.get("url")
-        if not u:
-            out.append(r)
-            continue
-        if u in seen:
-            continue
-        seen.add(u)
-        out.append(r)
-    return out
-
-
 def _fmt_duration(seconds: float) -> str:
     seconds = int(seconds)
     m, s = divmod(seconds, 60)
@@ -328,16 +429,39 @@ def _fmt_duration(seconds: float) -> str:
     return f"{h:d}:{m:02d}:{s:02d}" if h else f"{m:d}:{s:02d}"
 
 
-def _numeric_stats(values: List[Optional[int]]) -> Tuple[Optional[int], Optional[int], Optional[int]]:
-    """Return (min, median, avg) as ints for a list of optional ints, ignoring None."""
-    nums = [v for v in values if isinstance(v, int)]
-    if not nums:
+def _numeric_stats(values: List[int]) -> Tuple[Optional[int], Optional[int], Optional[int]]:
+    """Return (min, median, avg) as ints for a list of ints (None already dropped)."""
+    if not values:
         return None, None, None
-    nums_sorted = sorted(nums)
-    mn = nums_sorted[0]
-    med = int(statistics.median(nums_sorted))
-    avg = int(statistics.mean(nums_sorted))
-    return mn, med, avg
+    try:
+        arr = np.fromiter(values, dtype=np.int64, count=len(values))
+    except OverflowError:
+        # clean_number keeps every digit, so a garbled field can exceed int64;
+        # exact integer arithmetic copes with any size
+        nums = sorted(values)
+        mid = len(nums) // 2
+        med = nums[mid] if len(nums) % 2 else (nums[mid - 1] + nums[mid]) // 2
+        return nums[0], med, sum(nums) // len(nums)
+    return int(arr.min()), int(np.median(arr)), int(arr.mean())
+
+
+def _collect_stats(rows: List[Dict]) -> Tuple[List[int], List[int], int, int]:
+    """Gather prices, mileages and missing dealer/location counts in one pass."""
+    prices: List[int] = []
+    miles: List[int] = []
+    missing_dealer = missing_location = 0
+    for r in rows:
+        price = r.get("price")
+        if isinstance(price, int):
+            prices.append(price)
+        mileage = r.get("mileage")
+        if isinstance(mileage, int):
+            miles.append(mileage)
+        if not (r.get("dealer") or "").strip():
+            missing_dealer += 1
+        if not (r.get("location") or "").strip():
+            missing_location += 1
+    return prices, miles, missing_dealer, missing_location
 
 
 def _fmt_int(n: Optional[int]) -> str:
@@ -350,44 +474,33 @@ def _fmt_currency(n: Optional[int]) -> str:
 
 def filter_by_config(rows: List[Dict]) -> List[Dict]:
     filtered: List[Dict] = []
+    price_max = int(config.PRICE_MAX)
+    mileage_max = int(config.MILEAGE_MAX)
+    year_min = int(config.YEAR_MIN)
     for r in rows:
-        if r.get("price") is not None and r["price"] > int(config.PRICE_MAX):
+        price = r.get("price")
+        if price is not None and price > price_max:
             continue
-        if r.get("mileage") is not None and r["mileage"] > int(config.MILEAGE_MAX):
+        mileage = r.get("mileage")
+        if mileage is not None and mileage > mileage_max:
             continue
         # Year filtering from title (best-effort)
-        year_ok = True
-        title = r.get("title") or ""
-        year_digits = "".join(ch for ch in title[:4] if ch.isdigit())
-        if len(year_digits) == 4:
-            try:
-                if int(year_digits) < int(config.YEAR_MIN):
-                    year_ok = False
-            except ValueError:
-                pass
-        if not year_ok:
+        m = YEAR_RE.match(r.get("title") or "")
+        if m and int(m.group()) < year_min:
             continue
         filtered.append(r)
     return filtered
 
 
-def write_csv(rows: List[Dict], path: str) -> None:
+def write_parquet(rows: List[Dict], path: str) -> None:
+    """Write rows as a ZSTD-compressed Parquet file (requires pyarrow)."""
     os.makedirs(os.path.dirname(path), exist_ok=True)
-    fieldnames = [
-        "source",
-        "title",
-        "price",
-        "mileage",
-        "dealer",
-        "location",
-        "url",
-        "first_seen",
-    ]
-    with open(path, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        for r in rows:
-            writer.writerow(r)
+    text_fields = ("source", "title", "dealer", "location", "url", "first_seen")
+    columns = {k: pa.array([r.get(k) for r in rows], type=pa.string()) for k in text_fields}
+    for k in ("price", "mileage"):
+        columns[k] = pa.array([r.get(k) for r in rows], type=pa.int64())
+    order = ["source", "title", "price", "mileage", "dealer", "location", "url", "first_seen"]
+    pq.write_table(pa.table({k: columns[k] for k in order}), path, compression="zstd")
 
 
 def fetch_html_requests(session: requests.Session, url: str) -> Optional[str]:
@@ -402,52 +515,153 @@ def fetch_html_requests(session: requests.Session, url: str) -> Optional[str]:
         return None
 
 
+# Cookie-consent buttons, tried in order on each Selenium page load
+_CONSENT_CSS = (
+    "button#onetrust-accept-btn-handler",
+    "#onetrust-accept-btn-handler",
+    "button[aria-label='Accept all cookies']",
+    "button[aria-label*='Accept'][aria-label*='cookie']",
+)
+# Fallback: buttons whose text or label says "accept" (case-insensitive)
+_CONSENT_XPATHS = (
+    "//button[contains(translate(normalize-space(.), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'accept all cookies')]",
+    "//button[contains(translate(@aria-label, 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'accept')]",
+)
+# Present once listing cards have rendered
+_CARD_LOCATOR = (By.CSS_SELECTOR, ".vehicle-card, article.vehicle-card")
+
+
+# Polled over CDP: the navigation has replaced the tagged old document, and
+# the new one is past the loading state
+_NEW_DOCUMENT_JS = "!window.__carsStale && document.readyState !== 'loading'"
+# Resolves with the page HTML as soon as a vehicle card is in the DOM (watched
+# with a MutationObserver, so no polling round-trips), or with null once the
+# timeout in ms filled in for %d passes
+_CARDS_HTML_JS = """new Promise(resolve => {
+  const ready = () => document.querySelector('.vehicle-card') !== null;
+  if (ready()) return resolve(document.documentElement.outerHTML);
+  const obs = new MutationObserver(() => {
+    if (ready()) { obs.disconnect(); resolve(document.documentElement.outerHTML); }
+  });
+  obs.observe(document, {childList: true, subtree: true});
+  setTimeout(() => { obs.disconnect(); resolve(null); }, %d);
+})"""
+
+
+def _cdp_eval(driver: SeleniumWebDriver, expression: str, await_promise: bool = False) -> Any:
+    """Evaluate ``expression`` in the page via CDP and return its value.
+
+    With ``await_promise`` the expression's promise is awaited in the browser
+    and its resolved value returned.
+    """
+    params = {"expression": expression, "returnByValue": True}
+    if await_promise:
+        params["awaitPromise"] = True
+    res = driver.execute_cdp_cmd("Runtime.evaluate", params)
+    return res.get("result", {}).get("value")
+
+
+def _cdp_wait(driver: SeleniumWebDriver, expression: str, deadline: float) -> bool:
+    """Poll ``expression`` every 100 ms until it is truthy or ``deadline`` passes."""
+    while True:
+        try:
+            if _cdp_eval(driver, expression):
+                return True
+        except Exception:
+            pass  # execution context torn down mid-navigation; try again
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(0.1)
+
+
+def _accept_cookie_banner(driver: SeleniumWebDriver) -> None:
+    # 1) Try common CSS selectors (OneTrust / generic)
+    for sel in _CONSENT_CSS:
+        try:
+            els = driver.find_elements(By.CSS_SELECTOR, sel)
+            if els:
+                try:
+                    els[0].click()
+                    return
+                except Exception:
+                    pass
+        except Exception:
+            # ignore bad selector issues and keep trying
+            continue
+    # 2) Fallback: XPath contains text 'Accept all cookies'
+    for xp in _CONSENT_XPATHS:
+        try:
+            els = driver.find_elements(By.XPATH, xp)
+            if els:
+                try:
+                    els[0].click()
+                    return
+                except Exception:
+                    pass
+        except Exception:
+            continue
+
+
+def _selenium_cache_get(url: str) -> Optional[str]:
+    """Return HTML stored for ``url`` within CACHE_EXPIRE_AFTER seconds, if any."""
+    try:
+        with shelve.open(SELENIUM_CACHE_NAME, flag="r") as db:
+            stored_at, html = db[url]
+    except Exception:  # no cache file yet, missing key, or unreadable entry
+        return None
+    return html if time.time() - stored_at < CACHE_EXPIRE_AFTER else None
+
+
+def _selenium_cache_put(url: str, html: str) -> None:
+    try:
+        os.makedirs(os.path.dirname(SELENIUM_CACHE_NAME), exist_ok=True)
+        with shelve.open(SELENIUM_CACHE_NAME) as db:
+            db[url] = (time.time(), html)
+    except Exception as e:
+        print(f"[cars.com] selenium cache write failed: {e}")
+
+
 def fetch_html_selenium(driver: SeleniumWebDriver, url: str) -> Optional[str]:
+    if USE_CACHE:
+        html = _selenium_cache_get(url)
+        if html is not None:
+            return html
+    html = _load_html_selenium(driver, url)
+    if html and USE_CACHE:
+        _selenium_cache_put(url, html)
+    return html
+
+
+def _load_html_selenium(driver: SeleniumWebDriver, url: str) -> Optional[str]:
     try:
-        driver.get(url)
+        deadline = time.monotonic() + SELENIUM_WAIT
+        # Navigate over CDP where available: it skips WebDriver's page-load
+        # bookkeeping, and the DOM is read back in a single Runtime.evaluate.
+        try:
+            # Tag the current document so the new one can be told apart
+            _cdp_eval(driver, "window.__carsStale = true")
+            driver.execute_cdp_cmd("Page.navigate", {"url": url})
+            use_cdp = True
+        except Exception:
+            driver.get(url)
+            use_cdp = False
+
+        # Without the new document the cards below would be the previous page's
+        if use_cdp and not _cdp_wait(driver, _NEW_DOCUMENT_JS, deadline):
+            raise TimeoutError(f"navigation did not replace the page within {SELENIUM_WAIT}s")
         # Attempt to accept cookie banner if present
-        # 1) Try common CSS selectors (OneTrust / generic)
-        consent_selectors = [
-            "button#onetrust-accept-btn-handler",
-            "#onetrust-accept-btn-handler",
-            "button[aria-label='Accept all cookies']",
-            "button[aria-label*='Accept'][aria-label*='cookie']",
-        ]
-        for sel in consent_selectors:
-            try:
-                els = driver.find_elements(By.CSS_SELECTOR, sel)
-                if els:
-                    try:
-                        els[0].click()
-                        break
-                    except Exception:
-                        pass
-            except Exception:
-                # ignore bad selector issues and keep trying
-                continue
-        else:
-            # 2) Fallback: XPath contains text 'Accept all cookies'
-            try:
-                xpath_variants = [
-                    "//button[contains(translate(normalize-space(.), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'accept all cookies')]",
-                    "//button[contains(translate(@aria-label, 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'accept')]",
-                ]
-                for xp in xpath_variants:
-                    try:
-                        els = driver.find_elements(By.XPATH, xp)
-                        if els:
-                            try:
-                                els[0].click()
-                                break
-                            except Exception:
-                                pass
-                    except Exception:
-                        continue
-            except Exception:
-                pass
+        _accept_cookie_banner(driver)
+
+        if use_cdp:
+            remaining_ms = max(int((deadline - time.monotonic()) * 1000), 0)
+            html = _cdp_eval(driver, _CARDS_HTML_JS % remaining_ms, await_promise=True)
+            if not html:
+                raise TimeoutError(f"no vehicle cards after {SELENIUM_WAIT}s")
+            return html
+
         # Wait for at least one vehicle-card to appear, or a results container
         WebDriverWait(driver, SELENIUM_WAIT).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, ".vehicle-card, article.vehicle-card"))
+            EC.presence_of_element_located(_CARD_LOCATOR)
         )
         return driver.page_source
     except Exception as e:
@@ -455,22 +669,67 @@ def fetch_html_selenium(driver: SeleniumWebDriver, url: str) -> Optional[str]:
         return None
 
 
-def scrape() -> List[Dict]:
+def _fetch_page_html(
+    session: requests.Session, url: str, limiter: RateLimiter, stop: threading.Event
+) -> Tuple[Optional[str], List[Dict]]:
+    """Fetch and parse one results page from a worker thread once the limiter allows it.
+
+    Parsing here lets lxml (which releases the GIL) overlap with other pages'
+    downloads instead of running on the main thread.
+    """
+    limiter.wait(stop)
+    # Pagination may have ended while this worker waited for its slot
+    if stop.is_set():
+        return None, []
+    html = fetch_html_requests(session, url)
+    return html, parse_listings(html) if html else []
+
+
+def _render_page_html(
+    driver: SeleniumWebDriver, url: str, limiter: RateLimiter
+) -> Tuple[Optional[str], List[Dict]]:
+    """Load and parse one results page in the browser once the limiter allows it."""
+    limiter.wait()
+    html = fetch_html_selenium(driver, url)
+    return html, parse_listings(html) if html else []
+
+
+def scrape(on_page: Optional[Callable[[List[Dict]], None]] = None) -> List[Dict]:
+    """Scrape result pages and return their listings.
+
+    ``on_page`` is called with each page's new (not previously seen) rows as soon
+    as the page is handled, so callers can persist progress incrementally.
+    """
     all_rows: List[Dict] = []
     start_ts = time.time()
-    use_cache = os.getenv("REQUESTS_CACHE", "0") not in ("0", "false", "False")
-    session = make_session(use_cache=use_cache)
+    session = make_session(
+        use_cache=USE_CACHE,
+        pool_size=MAX_WORKERS,
+        cache_name=CACHE_NAME,
+        expire_after=CACHE_EXPIRE_AFTER,
+        stale_if_error=True,
+        cache_control=True,
+    )
     # In tests, make_session may be mocked to a dummy object without headers
-    if hasattr(session, "headers") and isinstance(getattr(session, "headers", None), dict):
+    if isinstance(getattr(session, "headers", None), MutableMapping):
         session.headers.update(HEADERS)
+        if USE_CACHE:
+            # Request-side no-cache directives would make requests-cache skip every read
+            session.headers.pop("Cache-Control", None)
+            session.headers.pop("Pragma", None)
     driver: Optional[SeleniumWebDriver] = None
 
-    # Warm-up: hit homepage to establish cookies/session
-    try:
-        if hasattr(session, "get"):
-            _ = session.get("https://www.cars.com/", timeout=min(REQUEST_TIMEOUT, 20))
-    except Exception:
-        pass
+    cache = getattr(session, "cache", None)
+    if cache is not None and cache.contains(url=build_search_url(1)):
+        # Results are being replayed from the cache; no cookies needed
+        print("[cars.com] Cached results found; skipping homepage warm-up.")
+    else:
+        # Warm-up: hit homepage to establish cookies/session
+        try:
+            if hasattr(session, "get"):
+                _ = session.get("https://www.cars.com/", timeout=min(REQUEST_TIMEOUT, 20))
+        except Exception:
+            pass
 
     # Run header
     mode = "selenium" if USE_SELENIUM else ("requests + auto-selenium" if AUTO_SELENIUM_ON_FAIL else "requests-only")
@@ -482,74 +741,108 @@ def scrape() -> List[Dict]:
     print(f"[cars.com] Pages: {MAX_PAGES} • Page size: {PAGE_SIZE}")
 
     cumulative = 0
-    for page in range(1, MAX_PAGES + 1):
-        url = build_search_url(page)
-        print(f"[cars.com] Page {page}/{MAX_PAGES} → {url}")
-
-        html: Optional[str]
-        page_rows: List[Dict]
-
-        if USE_SELENIUM:
-            # Skip requests entirely for speed and to avoid bot timeouts
-            if driver is None:
-                try:
-                    driver = make_driver()
-                except Exception as e:
-                    print(f"[cars.com] selenium driver init failed: {e}")
-                    driver = None
-            if driver is not None:
-                html = fetch_html_selenium(driver, url)
-                page_rows = parse_listings(html) if html else []
-            else:
-                html = None
-                page_rows = []
-        else:
-            html = fetch_html_requests(session, url)
-            page_rows = parse_listings(html) if html else []
-
-        # If requests failed entirely, optionally auto-fallback
-        if not page_rows and (html is None) and AUTO_SELENIUM_ON_FAIL:
-            if driver is None:
-                try:
-                    driver = make_driver()
-                except Exception as e:
-                    print(f"[cars.com] selenium driver init failed: {e}")
-                    driver = None
-            if driver is not None:
-                html = fetch_html_selenium(driver, url)
-                page_rows = parse_listings(html) if html else []
-
-        # Stop before collecting out-of-area results
-        if html and is_partial_matches(html):
-            print(f"[cars.com] Partial matches banner on page {page}; stopping to avoid out-of-area results.")
-            break
-
-        # If HTML looks like a bot-check or empty results, use configured selenium path
-        if not page_rows and (USE_SELENIUM or (AUTO_SELENIUM_ON_FAIL and looks_like_bot_check(html))):
-            if driver is None:
-                try:
-                    driver = make_driver()
-                except Exception as e:
-                    print(f"[cars.com] selenium driver init failed: {e}")
-                    driver = None
-            if driver is not None:
-                html = fetch_html_selenium(driver, url)
-                page_rows = parse_listings(html) if html else []
-
-        if not page_rows:
-            reason = "Failed to fetch" if not html else "No results found"
-            print(f"[cars.com] {reason} on page {page}; stopping.")
-            break
-
-        # Per-page progress
-        cumulative += len(page_rows)
-        elapsed = _fmt_duration(time.time() - start_ts)
-        print(f"[cars.com] ✓ Parsed {len(page_rows)} on page {page} • cumulative {cumulative} • elapsed {elapsed}")
-
-        all_rows.extend(page_rows)
-
-        # Polite delay between pages
-        polite_sleep(PAGE_DELAY_RANGE)
+    # Requests mode fetches a window of pages concurrently and then handles them
+    # in page order; Selenium drives one browser, so it stays one page at a time.
+    window = 1 if USE_SELENIUM else max(MAX_WORKERS, 1)
+    # Every page load, whether by requests or the browser, shares one politeness
+    # budget: starts stay PAGE_DELAY_RANGE apart, as in a serial run, while
+    # downloads and parsing overlap the waits
+    limiter = RateLimiter(PAGE_DELAY_RANGE)
+    stop = threading.Event()
+    seen_urls: set = set()
+    first = 1
+    with ThreadPoolExecutor(max_workers=window) as executor:
+        while first <= MAX_PAGES and not stop.is_set():
+            batch = range(first, min(first + window, MAX_PAGES + 1))
+            prefetched = {}
+            if not USE_SELENIUM:
+                prefetched = {
+                    p: executor.submit(_fetch_page_html, session, build_search_url(p), limiter, stop)
+                    for p in batch
+                }
+
+            for page in batch:
+                url = build_search_url(page)
+                print(f"[cars.com] Page {page}/{MAX_PAGES} → {url}")
+
+                html: Optional[str]
+                page_rows: List[Dict]
+
+                if USE_SELENIUM:
+                    # Skip requests entirely for speed and to avoid bot timeouts
+                    if driver is None:
+                        try:
+                            driver = make_driver()
+                        except Exception as e:
+                            print(f"[cars.com] selenium driver init failed: {e}")
+                            driver = None
+                    if driver is not None:
+                        html, page_rows = _render_page_html(driver, url, limiter)
+                    else:
+                        html = None
+                        page_rows = []
+                else:
+                    html, page_rows = prefetched[page].result()
+
+                # If requests failed entirely, optionally auto-fallback
+                if not page_rows and (html is None) and AUTO_SELENIUM_ON_FAIL:
+                    if driver is None:
+                        try:
+                            driver = make_driver()
+                        except Exception as e:
+                            print(f"[cars.com] selenium driver init failed: {e}")
+                            driver = None
+                    if driver is not None:
+                        html, page_rows = _render_page_html(driver, url, limiter)
+
+                # Stop before collecting out-of-area results
+                if html and is_partial_matches(html):
+                    print(f"[cars.com] Partial matches banner on page {page}; stopping to avoid out-of-area results.")
+                    stop.set()
+                    break
+
+                # If HTML looks like a bot-check or empty results, use configured selenium path
+                if not page_rows and (USE_SELENIUM or (AUTO_SELENIUM_ON_FAIL and looks_like_bot_check(html))):
+                    if driver is None:
+                        try:
+                            driver = make_driver()
+                        except Exception as e:
+                            print(f"[cars.com] selenium driver init failed: {e}")
+                            driver = None
+                    if driver is not None:
+                        html, page_rows = _render_page_html(driver, url, limiter)
+
+                if not page_rows:
+                    reason = "Failed to fetch" if not html else "No results found"
+                    print(f"[cars.com] {reason} on page {page}; stopping.")
+                    stop.set()
+                    break
+
+                # Results shift between requests, so adjacent pages can repeat
+                # listings; keep only ones not seen earlier in the run
+                new_rows = [r for r in page_rows if not r.get("url") or r["url"] not in seen_urls]
+                seen_urls.update(r["url"] for r in new_rows if r.get("url"))
+                repeated = len(page_rows) - len(new_rows)
+
+                # Per-page progress
+                cumulative += len(new_rows)
+                elapsed = _fmt_duration(time.time() - start_ts)
+                print(f"[cars.com] ✓ Parsed {len(page_rows)} on page {page} • cumulative {cumulative} • elapsed {elapsed}")
+
+                all_rows.extend(new_rows)
+                if on_page is not None:
+                    on_page(new_rows)
+
+                # Mostly-repeated pages mean pagination has run dry
+                if repeated * 2 > len(page_rows):
+                    print(f"[cars.com] {repeated}/{len(page_rows)} listings on page {page} already seen; stopping.")
+                    stop.set()
+                    break
+
+            # Pages past the stopping point are not needed; drop any still queued
+            for future in prefetched.values():
+                future.cancel()
+            first += len(batch)
 
     if driver:
         try:
@@ -561,35 +854,47 @@ def scrape() -> List[Dict]:
 
 
 def main() -> None:
-    rows = scrape()
-    total_raw = len(rows)
-    # Global de-dup by URL before filtering
-    deduped = dedupe_rows(rows)
-    dropped_dupes = total_raw - len(deduped)
-
-    # Quick stats before filtering
-    price_min, price_med, price_avg_int = _numeric_stats([r.get("price") for r in deduped])
-    miles_min, miles_med, miles_avg_int = _numeric_stats([r.get("mileage") for r in deduped])
-    missing_dealer = sum(1 for r in deduped if not (r.get("dealer") or "" ).strip())
-    missing_location = sum(1 for r in deduped if not (r.get("location") or "").strip())
+    parquet = OUTPUT_FORMAT == "parquet"
+    if parquet and pa is None:
+        print("[cars.com] pyarrow not installed; writing CSV instead of Parquet.")
+        parquet = False
+    if parquet:
+        rows = scrape()
+    else:
+        # Stream each page's filtered rows to disk so an interrupted run keeps its progress
+        with open_csv(OUTPUT_FILE) as out:
+            def on_page(page_rows: List[Dict]) -> None:
+                append_csv(out, filter_by_config(page_rows))
+                out.flush()
+
+            rows = scrape(on_page=on_page)
+
+    # Quick stats before filtering (scrape() already dropped repeated URLs)
+    prices, miles, missing_dealer, missing_location = _collect_stats(rows)
+    price_min, price_med, price_avg_int = _numeric_stats(prices)
+    miles_min, miles_med, miles_avg_int = _numeric_stats(miles)
 
     print("[cars.com] ── Summary (raw) ───────────────────────────────────────────")
-    print(f"[cars.com] Total rows: {total_raw} • Unique by URL: {len(deduped)} • Duplicates dropped: {dropped_dupes}")
+    print(f"[cars.com] Total rows (unique by URL): {len(rows)}")
     print(f"[cars.com] Price: min {_fmt_currency(price_min)} • median {_fmt_currency(price_med)} • avg {_fmt_currency(price_avg_int)}")
     print(f"[cars.com] Mileage: min {_fmt_int(miles_min)} • median {_fmt_int(miles_med)} • avg {_fmt_int(miles_avg_int)}")
     print(f"[cars.com] Missing dealer: {missing_dealer} • Missing location: {missing_location}")
 
     # Apply filters from config
-    filtered = filter_by_config(deduped)
+    filtered = filter_by_config(rows)
     print("[cars.com] ── Summary (filtered) ─────────────────────────────────────")
-    print(f"[cars.com] Rows after filtering: {len(filtered)} (dropped {len(deduped) - len(filtered)})")
-    f_price_min, f_price_med, f_price_avg_int = _numeric_stats([r.get("price") for r in filtered])
-    f_miles_min, f_miles_med, f_miles_avg_int = _numeric_stats([r.get("mileage") for r in filtered])
+    print(f"[cars.com] Rows after filtering: {len(filtered)} (dropped {len(rows) - len(filtered)})")
+    f_prices, f_miles, _, _ = _collect_stats(filtered)
+    f_price_min, f_price_med, f_price_avg_int = _numeric_stats(f_prices)
+    f_miles_min, f_miles_med, f_miles_avg_int = _numeric_stats(f_miles)
     print(f"[cars.com] Price: min {_fmt_currency(f_price_min)} • median {_fmt_currency(f_price_med)} • avg {_fmt_currency(f_price_avg_int)}")
     print(f"[cars.com] Mileage: min {_fmt_int(f_miles_min)} • median {_fmt_int(f_miles_med)} • avg {_fmt_int(f_miles_avg_int)}")
 
-    write_csv(filtered, OUTPUT_FILE)
-    print(f"[cars.com] Wrote CSV: {OUTPUT_FILE}")
+    if parquet:
+        write_parquet(filtered, PARQUET_FILE)
+        print(f"[cars.com] Wrote Parquet: {PARQUET_FILE}")
+    else:
+        print(f"[cars.com] Wrote CSV: {OUTPUT_FILE}")
 
 
 if __name__ == "__main__":
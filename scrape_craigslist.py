@@ -1,23 +1,33 @@
-import csv
 import os
 import json
 import random
+import re
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple, Union
 from urllib.parse import urlencode, urljoin
 
+import numpy as np
 import requests
-from bs4 import BeautifulSoup
+from lxml import etree
+from lxml import html as lxml_html
 
-from utils.throttle import polite_sleep
+try:
+    import orjson
+except ImportError:  # pragma: no cover - fall back to the stdlib parser
+    orjson = None  # type: ignore
+
+from utils.throttle import RateLimiter
 
 from utils.url import canonical_url
+from utils.csv_writer import write_csv
+from utils.parsing import HTML_PARSER, YEAR_RE, clean_number, element_text, first_match, has_class
 
 import config
 from utils.http_client import make_session
 from utils.console import console
-from functools import partial
+from functools import lru_cache, partial
 
 print = partial(console.print, style="magenta", markup=False)
 
@@ -45,6 +55,25 @@ MAX_PAGES = int(os.getenv("CRAIG_MAX_PAGES", "9999"))
 PAGE_DELAY_RANGE: Tuple[float, float] = (3.0, 7.0)
 REQUEST_TIMEOUT = int(os.getenv("CRAIG_TIMEOUT", "45"))
 
+# orjson's JSONDecodeError subclasses json.JSONDecodeError
+_json_loads = orjson.loads if orjson else json.loads
+
+
+# Body of the structured results blob, matched on the raw response bytes
+_LD_RESULTS_RE = re.compile(
+    rb"""<script\b[^>]*\bid=["']?ld_searchpage_results\b[^>]*>(.*?)</script\s*>""", re.S | re.I
+)
+# Structured results blob, falling back to any JSON-LD script
+_LD_SCRIPT_XPATH = etree.XPath(
+    "(//script[@id='ld_searchpage_results'] | //script[@type='application/ld+json'])"
+)
+# Legacy result rows and their fields, compiled once.  Field queries return
+# only the first match in document order, mirroring ``select_one``.
+_ROWS_XPATH = etree.XPath(f"//li[{has_class('result-row')} or {has_class('cl-search-result')}]")
+_LINK_XPATH = etree.XPath(f"(.//a[{has_class('result-title')} or {has_class('hdrlnk')}])[1]")
+_PRICE_XPATH = etree.XPath(f"(.//span[{has_class('result-price')} or {has_class('price')}])[1]")
+_HOOD_XPATH = etree.XPath(f"(.//span[{has_class('result-hood')} or {has_class('nearby')}])[1]")
+
 
 def build_search_url(page: int) -> str:
     offset = (page - 1) * 120
@@ -73,97 +102,125 @@ def build_search_url_for_category(category: str, page: int) -> str:
     return f"{BASE_DOMAIN}/search/{category}?{urlencode(params)}"
 
 
-def clean_number(text: Optional[str]) -> Optional[int]:
-    if not text:
-        return None
-    digits = "".join(ch for ch in text if ch.isdigit())
-    return int(digits) if digits else None
+@lru_cache(maxsize=4096)
+def _absurl(href: str) -> str:
+    """Resolve ``href`` against the Craigslist domain (memoized)."""
+    return urljoin(BASE_DOMAIN, href)
 
 
+def _ld_script_text(root: Any) -> Optional[str]:
+    # The id'd results block wins over any other JSON-LD script on the page
+    scripts = _LD_SCRIPT_XPATH(root)
+    script = next((el for el in scripts if el.get("id") == "ld_searchpage_results"), None)
+    if script is None:
+        script = scripts[0] if scripts else None
+    return script.text if script is not None else None
 
 
-def parse_listings(html: str) -> List[Dict]:
-    soup = BeautifulSoup(html, "lxml")
+def _rows_from_ld(script_text: Union[str, bytes], first_seen: str) -> List[Dict]:
+    """Build rows from the body of a JSON-LD search results script."""
     results: List[Dict] = []
     seen_urls = set()
+    try:
+        data = _json_loads(script_text)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return results
+    if isinstance(data, dict):
+        items = data.get("itemListElement") or data.get("about") or []
+        for entry in items:
+            # itemListElement is often an array of ListItem with "item" nested
+            item = entry.get("item") if isinstance(entry, dict) and "item" in entry else entry
+            if not isinstance(item, dict):
+                continue
+            title = item.get("name") or item.get("headline")
+            url = item.get("url") or item.get("@id")
+            if url and not url.startswith("http"):
+                url = _absurl(url)
+            url = canonical_url(url) if url else None
+
+            # Guard against empty rows
+            if not url and not title:
+                continue
+
+            price_val = None
+            offers = item.get("offers")
+            if isinstance(offers, dict):
+                price_val = offers.get("price")
+            elif "price" in item:
+                price_val = item.get("price")
+            price = clean_number(str(price_val) if price_val is not None else None)
+
+            location = None
+            area = item.get("areaServed") or item.get("address")
+            if isinstance(area, dict):
+                location = area.get("name") or area.get("addressLocality") or area.get("addressRegion")
+            elif isinstance(area, str):
+                location = area
+
+            if url and url in seen_urls:
+                continue
+            if url:
+                seen_urls.add(url)
+
+            results.append(
+                {
+                    "source": "craigslist",
+                    "title": title,
+                    "price": price,
+                    "mileage": None,
+                    "dealer": None,
+                    "location": location,
+                    "url": url,
+                    "first_seen": first_seen,
+                }
+            )
+    return results
+
+
+def parse_listings(html: Union[str, bytes]) -> List[Dict]:
+    results: List[Dict] = []
+    raw = html.encode("utf-8") if isinstance(html, str) else html
+    if not raw or not raw.strip():
+        return results
+    # Every row on a page is seen at the same moment
+    first_seen = datetime.utcnow().isoformat(timespec="seconds")
 
     # Craigslist search pages embed results in a JSON block with id
     # "ld_searchpage_results". Prefer parsing this structured data if
-    # available as it is more consistent than scraping DOM elements.
-    script = soup.find("script", id="ld_searchpage_results") or soup.find(
-        "script", attrs={"type": "application/ld+json"}
-    )
-    if script and script.string:
-        try:
-            data = json.loads(script.string)
-        except json.JSONDecodeError:
-            data = None
-        if isinstance(data, dict):
-            items = data.get("itemListElement") or data.get("about") or []
-            for entry in items:
-                # itemListElement is often an array of ListItem with "item" nested
-                item = entry.get("item") if isinstance(entry, dict) and "item" in entry else entry
-                if not isinstance(item, dict):
-                    continue
-                title = item.get("name") or item.get("headline")
-                url = item.get("url") or item.get("@id")
-                if url and not url.startswith("http"):
-                    url = urljoin(BASE_DOMAIN, url)
-                url = canonical_url(url) if url else None
-
-                # Guard against empty rows
-                if not url and not title:
-                    continue
-
-                price_val = None
-                offers = item.get("offers")
-                if isinstance(offers, dict):
-                    price_val = offers.get("price")
-                elif "price" in item:
-                    price_val = item.get("price")
-                price = clean_number(str(price_val) if price_val is not None else None)
-
-                location = None
-                area = item.get("areaServed") or item.get("address")
-                if isinstance(area, dict):
-                    location = area.get("name") or area.get("addressLocality") or area.get("addressRegion")
-                elif isinstance(area, str):
-                    location = area
-
-                if url and url in seen_urls:
-                    continue
-                if url:
-                    seen_urls.add(url)
-
-                results.append(
-                    {
-                        "source": "craigslist",
-                        "title": title,
-                        "price": price,
-                        "mileage": None,
-                        "dealer": None,
-                        "location": location,
-                        "url": url,
-                        "first_seen": datetime.utcnow().isoformat(timespec="seconds"),
-                    }
-                )
+    # available as it is more consistent than scraping DOM elements; it can
+    # be cut straight out of the raw bytes without building a DOM at all.
+    # A plain substring test rules out pages without the block before the regex runs
+    m = _LD_RESULTS_RE.search(raw) if b"ld_searchpage_results" in raw else None
+    if m:
+        results = _rows_from_ld(m.group(1), first_seen)
+        if results:
+            return results
+
+    try:
+        root = lxml_html.fromstring(raw, parser=HTML_PARSER)
+    except etree.ParserError:  # e.g. a document that is only a comment
+        return results
+
+    if m is None:
+        # No results block; try any other JSON-LD script
+        script_text = _ld_script_text(root)
+        if script_text:
+            results = _rows_from_ld(script_text, first_seen)
 
     # Fallback to legacy HTML scraping if structured data isn't available
     if not results:
-        rows = soup.select("li.result-row, li.cl-search-result")
-        for row in rows:
-            link = row.select_one("a.result-title, a.hdrlnk")
-            href = link.get("href") if link else None
-            url = urljoin(BASE_DOMAIN, href) if href else None
+        seen_urls = set()
+        for row in _ROWS_XPATH(root):
+            link = first_match(_LINK_XPATH, row)
+            href = link.get("href") if link is not None else None
+            url = _absurl(href) if href else None
             url = canonical_url(url) if url else None
-            title = link.get_text(strip=True) if link else None
+            title = element_text(link)
 
-            price_el = row.select_one("span.result-price, span.price")
-            price_text = price_el.get_text(strip=True) if price_el else None
-            price = clean_number(price_text)
+            price = clean_number(element_text(first_match(_PRICE_XPATH, row)))
 
-            hood_el = row.select_one("span.result-hood, span.nearby")
-            location = hood_el.get_text(strip=True).strip("()") if hood_el else None
+            hood_el = first_match(_HOOD_XPATH, row)
+            location = element_text(hood_el).strip("()") if hood_el is not None else None
 
             if not url and not title:
                 continue
@@ -182,7 +239,7 @@ def parse_listings(html: str) -> List[Dict]:
                     "dealer": None,
                     "location": location,
                     "url": url,
-                    "first_seen": datetime.utcnow().isoformat(timespec="seconds"),
+                    "first_seen": first_seen,
                 }
             )
 
@@ -215,15 +272,16 @@ def _numeric_stats(values: List[Optional[int]]) -> Tuple[Optional[int], Optional
     nums = [v for v in values if isinstance(v, int)]
     if not nums:
         return None, None, None
-    nums_sorted = sorted(nums)
-    mn = nums_sorted[0]
-    mid = len(nums_sorted) // 2
-    if len(nums_sorted) % 2 == 1:
-        med = nums_sorted[mid]
-    else:
-        med = int((nums_sorted[mid - 1] + nums_sorted[mid]) / 2)
-    avg = int(sum(nums_sorted) / len(nums_sorted))
-    return mn, med, avg
+    try:
+        arr = np.fromiter(nums, dtype=np.int64, count=len(nums))
+    except OverflowError:
+        # clean_number keeps every digit, so a garbled price can exceed int64;
+        # exact integer arithmetic copes with any size
+        nums.sort()
+        mid = len(nums) // 2
+        med = nums[mid] if len(nums) % 2 else (nums[mid - 1] + nums[mid]) // 2
+        return nums[0], med, sum(nums) // len(nums)
+    return int(arr.min()), int(np.median(arr)), int(arr.mean())
 
 
 def _fmt_int(n: Optional[int]) -> str:
@@ -236,48 +294,58 @@ def _fmt_currency(n: Optional[int]) -> str:
 
 def filter_by_config(rows: List[Dict]) -> List[Dict]:
     filtered: List[Dict] = []
+    price_max = int(config.PRICE_MAX)
+    year_min = int(config.YEAR_MIN)
     for r in rows:
-        if r.get("price") is not None and r["price"] > int(config.PRICE_MAX):
+        price = r.get("price")
+        if price is not None and price > price_max:
             continue
-        year_ok = True
-        title = r.get("title") or ""
-        year_digits = "".join(ch for ch in title[:4] if ch.isdigit())
-        if len(year_digits) == 4:
-            try:
-                if int(year_digits) < int(config.YEAR_MIN):
-                    year_ok = False
-            except ValueError:
-                pass
-        if not year_ok:
+        # Year filtering from title (best-effort)
+        m = YEAR_RE.match(r.get("title") or "")
+        if m and int(m.group()) < year_min:
             continue
         filtered.append(r)
     return filtered
 
 
-def write_csv(rows: List[Dict], path: str) -> None:
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    fieldnames = [
-        "source",
-        "title",
-        "price",
-        "mileage",
-        "dealer",
-        "location",
-        "url",
-        "first_seen",
-    ]
-    with open(path, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        for r in rows:
-            writer.writerow(r)
+def _scrape_category(
+    session: requests.Session, category: str, start_ts: float, limiter: RateLimiter
+) -> List[Dict]:
+    """Fetch pages of one category until a page fails or comes back empty.
+
+    ``limiter`` is shared by every category, since they all hit the same host.
+    """
+    rows: List[Dict] = []
+    for page in range(1, MAX_PAGES + 1):
+        url = build_search_url_for_category(category, page)
+        print(f"[craigslist] {category} page {page}/{MAX_PAGES} → {url}")
+        limiter.wait()
+        try:
+            resp = session.get(url, timeout=REQUEST_TIMEOUT)
+        except requests.RequestException as e:
+            print(f"[craigslist] Request error on {category} page {page}: {e}")
+            break
+
+        if resp.status_code != 200:
+            print(f"[craigslist] HTTP {resp.status_code} on {category} page {page}; stopping this category.")
+            break
+
+        # Raw bytes: the parser decodes UTF-8 itself, skipping requests' charset sniffing
+        page_rows = parse_listings(resp.content)
+        if not page_rows:
+            print(f"[craigslist] No results found on {category} page {page}; stopping this category.")
+            break
+
+        rows.extend(page_rows)
+        elapsed = _fmt_duration(time.time() - start_ts)
+        print(f"[craigslist] ✓ Parsed {len(page_rows)} on {category} page {page} • {category} total {len(rows)} • elapsed {elapsed}")
+    return rows
 
 
 def scrape() -> List[Dict]:
     all_rows: List[Dict] = []
     start_ts = time.time()
-    use_cache = os.getenv("REQUESTS_CACHE", "0") not in ("0", "false", "False")
-    session = make_session(use_cache=use_cache)
+    session = make_session()
     session.headers.update(HEADERS)
 
     # Run header
@@ -286,32 +354,17 @@ def scrape() -> List[Dict]:
     print(f"[craigslist] Domain: {CRAIGS_DOMAIN} • Categories: {cats_str} • Pages per category: {MAX_PAGES}")
     print(f"[craigslist] Zip {config.ZIP_CODE} • Radius {config.RADIUS_MILES}mi • Year ≥ {config.YEAR_MIN} • Price ≤ ${int(config.PRICE_MAX):,} • Miles ≤ {int(config.MILEAGE_MAX):,}")
 
-    cumulative = 0
-    for category in CRAIG_CATEGORIES:
-        for page in range(1, MAX_PAGES + 1):
-            url = build_search_url_for_category(category, page)
-            print(f"[craigslist] {category} page {page}/{MAX_PAGES} → {url}")
-            try:
-                resp = session.get(url, timeout=REQUEST_TIMEOUT)
-            except requests.RequestException as e:
-                print(f"[craigslist] Request error on {category} page {page}: {e}")
-                break
-
-            if resp.status_code != 200:
-                print(f"[craigslist] HTTP {resp.status_code} on {category} page {page}; stopping this category.")
-                break
-
-            page_rows = parse_listings(resp.text)
-            if not page_rows:
-                print(f"[craigslist] No results found on {category} page {page}; stopping this category.")
-                break
-
-            cumulative += len(page_rows)
-            elapsed = _fmt_duration(time.time() - start_ts)
-            print(f"[craigslist] ✓ Parsed {len(page_rows)} on {category} page {page} • cumulative {cumulative} • elapsed {elapsed}")
-            all_rows.extend(page_rows)
-
-            polite_sleep(PAGE_DELAY_RANGE)
+    # Categories paginate side by side but share one politeness budget for the
+    # host: request starts stay PAGE_DELAY_RANGE apart, as in a serial run,
+    # while downloads and parsing overlap the waits
+    limiter = RateLimiter(PAGE_DELAY_RANGE)
+    with ThreadPoolExecutor(max_workers=len(CRAIG_CATEGORIES)) as executor:
+        futures = [
+            executor.submit(_scrape_category, session, category, start_ts, limiter)
+            for category in CRAIG_CATEGORIES
+        ]
+        for future in futures:
+            all_rows.extend(future.result())
 
     # Deduplicate across categories/pages before returning
     return dedupe_rows(all_rows)
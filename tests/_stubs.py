@@ -0,0 +1,6 @@
+import types
+
+
+def stub_resp(status, content=b"", **attrs):
+    """Cheap stand-in for a ``requests.Response``; far faster to build than a MagicMock."""
+    return types.SimpleNamespace(status_code=status, content=content, headers={}, **attrs)
@@ -0,0 +1,108 @@
+import re
+import sys
+import threading
+
+import pandas as pd
+import pytest
+
+import config
+import run_all
+
+
+def _row(source, url, price, mileage=50000):
+    return {"source": source, "title": f"{source} car", "price": price, "mileage": mileage, "url": url}
+
+
+def test_as_df_keeps_scraped_ints_as_int64():
+    df = run_all.as_df([_row("cars.com", "https://x/1", 8999, 123456), _row("cars.com", "https://x/2", None, None)])
+    assert str(df["price"].dtype) == "Int64"
+    assert str(df["mileage"].dtype) == "Int64"
+    assert df["price"].tolist() == [8999, pd.NA]
+    assert df["mileage"].tolist() == [123456, pd.NA]
+
+
+def test_as_df_parses_noisy_strings_to_int64():
+    rows = [
+        {"source": "cargurus", "url": f"https://x/{i}", "price": p, "mileage": m}
+        for i, (p, m) in enumerate([("$8,999", "123,456 mi"), ("", "98,000 miles"), (None, None)])
+    ]
+    df = run_all.as_df(rows)
+    assert str(df["price"].dtype) == "Int64"
+    assert str(df["mileage"].dtype) == "Int64"
+    assert df["price"].tolist() == [8999, pd.NA, pd.NA]
+    assert df["mileage"].tolist() == [123456, 98000, pd.NA]
+
+
+@pytest.fixture
+def run_main(tmp_path, monkeypatch):
+    """Run run_all.main() offline with the given per-site rows and CLI flags."""
+    # main() pushes CLI settings onto config and the scraper modules; restore them
+    for obj in (config, run_all.cl, run_all.ccom, run_all.cg):
+        for key in ("ZIP_CODE", "RADIUS_MILES", "PRICE_MAX", "MILEAGE_MAX", "MAX_PAGES"):
+            if hasattr(obj, key):
+                monkeypatch.setattr(obj, key, getattr(obj, key))
+    monkeypatch.setattr(run_all, "OUTPUT_DIR", tmp_path)
+
+    def run(site_rows, *flags, barrier=None):
+        for mod, rows in ((run_all.cl, site_rows.get("craigslist")), (run_all.ccom, site_rows.get("carscom")),
+                          (run_all.cg, site_rows.get("cargurus"))):
+            def scrape(rows=rows):
+                if barrier is not None:
+                    barrier.wait()  # only returns once every site is scraping at once
+                return list(rows or [])
+            monkeypatch.setattr(mod, "scrape", scrape)
+        sites = ",".join(site_rows)
+        monkeypatch.setattr(sys, "argv", ["run_all.py", "--sites", sites, "--price-max", "8000", *flags])
+        run_all.main()
+        return sorted(p.name for p in tmp_path.iterdir())
+
+    return run
+
+
+def _combined(tmp_path):
+    (path,) = tmp_path.glob("combined-*.csv")
+    return pd.read_csv(path)
+
+
+def test_main_scrapes_sites_concurrently_and_keeps_first_site_duplicate(run_main, tmp_path):
+    site_rows = {
+        "craigslist": [_row("craigslist", "https://dup", 5000), _row("craigslist", "https://cl", 6000)],
+        "carscom": [_row("cars.com", "https://dup", 3000)],
+        "cargurus": [_row("cargurus", "https://cg", 7000)],
+    }
+    run_main(site_rows, "--no-parquet", barrier=threading.Barrier(3, timeout=5))
+    combined = _combined(tmp_path)
+    # Sites combine in --sites order, so the craigslist copy of the shared URL wins
+    assert sorted(combined["url"]) == ["https://cg", "https://cl", "https://dup"]
+    assert combined.set_index("url").loc["https://dup", "source"] == "craigslist"
+
+
+def test_main_filters_each_site_before_dedupe(run_main, tmp_path):
+    site_rows = {
+        # Over --price-max, so it is dropped before it can shadow the cars.com copy
+        "craigslist": [_row("craigslist", "https://dup", 9500)],
+        "carscom": [_row("cars.com", "https://dup", 3000)],
+    }
+    run_main(site_rows, "--no-parquet")
+    combined = _combined(tmp_path)
+    assert combined["url"].tolist() == ["https://dup"]
+    assert combined["source"].tolist() == ["cars.com"]
+    assert combined["price"].tolist() == [3000]
+
+
+@pytest.mark.parametrize(
+    "flags, pyarrow, expected",
+    [
+        ((), True, {"carscom.parquet", "combined.parquet"}),
+        (("--csv",), True, {"carscom.parquet", "carscom.csv", "combined.parquet", "combined.csv"}),
+        (("--no-parquet",), True, {"carscom.csv", "combined.csv"}),
+        ((), False, {"carscom.csv", "combined.csv"}),
+    ],
+)
+def test_main_output_formats(run_main, monkeypatch, flags, pyarrow, expected):
+    monkeypatch.setattr(run_all, "pa", object() if pyarrow else None)
+    # Stand in for pyarrow's writer so the test doesn't depend on the extra
+    monkeypatch.setattr(pd.DataFrame, "to_parquet", lambda self, path, **kwargs: path.write_bytes(b"PAR1"))
+    written = run_main({"carscom": [_row("cars.com", "https://x/1", 3000)]}, *flags)
+    # Drop the combined file's timestamp
+    assert {re.sub(r"-\d{8}-\d{6}", "", name) for name in written} == expected
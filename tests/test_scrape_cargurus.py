@@ -1,11 +1,11 @@
 import os
-import types
 import unittest
 from datetime import datetime
 from pathlib import Path
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch
 
 from utils.url import canonical_url
+from _stubs import stub_resp
 
 import scrape_cargurus as cg
 
@@ -32,6 +32,22 @@ class CarGurusScraperTests(unittest.TestCase):
         self.assertEqual(first["url"], canonical_url(first["url"]))
         datetime.fromisoformat(first["first_seen"])
 
+    def test_parse_listings_reads_embedded_json(self):
+        html = (
+            "<html><head><script>var ga = 1;</script><script>window.__DATA__ = "
+            '{"meta": {"title": "Results"}, "search": {"results": {"listings": ['
+            '{"title": "2011 Honda Accord", "price": 7500, "mileage": "98,000 mi",'
+            ' "dealer": {"name": "D1", "address": "Camden, NJ"}, "canonicalUrl": "/Cars/l1?utm=1"}'
+            "]}}};</script></head><body></body></html>"
+        )
+        rows = cg.parse_listings(html)
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["title"], "2011 Honda Accord")
+        self.assertEqual(rows[0]["price"], 7500)
+        self.assertEqual(rows[0]["mileage"], 98000)
+        self.assertEqual(rows[0]["dealer"], "D1")
+        self.assertEqual(rows[0]["url"], "https://www.cargurus.com/Cars/l1")
+
     def test_filter_by_config_applies_limits(self):
         rows = cg.parse_listings(HTML)
         with patch.object(cg, "config", autospec=True) as mock_cfg:
@@ -45,10 +61,7 @@ class CarGurusScraperTests(unittest.TestCase):
 
     @patch("requests.Session.get")
     def test_scrape_handles_http_errors(self, mock_get):
-        resp = MagicMock()
-        resp.status_code = 500
-        resp.text = ""
-        mock_get.return_value = resp
+        mock_get.return_value = stub_resp(500)
         with patch.object(cg, "make_session") as ms:
             ms.return_value = cg.requests.Session()
             rows = cg.scrape()
@@ -56,10 +69,7 @@ class CarGurusScraperTests(unittest.TestCase):
 
     @patch("requests.Session.get")
     def test_scrape_returns_rows(self, mock_get):
-        resp = MagicMock()
-        resp.status_code = 200
-        resp.text = HTML
-        mock_get.return_value = resp
+        mock_get.return_value = stub_resp(200, HTML.encode("utf-8"))
         with patch.object(cg, "make_session") as ms, patch.object(cg, "MAX_PAGES", 1), patch.object(cg, "PAGE_DELAY_RANGE", (0, 0)):
             ms.return_value = cg.requests.Session()
             rows = cg.scrape()
@@ -70,6 +80,59 @@ class CarGurusScraperTests(unittest.TestCase):
         self.assertEqual(rows[0]["url"], canonical_url(rows[0]["url"]))
         datetime.fromisoformat(rows[0]["first_seen"])
 
+    @patch("requests.Session.get")
+    def test_scrape_stops_at_first_empty_page(self, mock_get):
+        # Pages are fetched concurrently, so answer by page number rather than call order
+        def respond(url, **kwargs):
+            return stub_resp(200, HTML.encode("utf-8") if url.endswith("page=1") else b"<html></html>")
+
+        mock_get.side_effect = respond
+        with patch.object(cg, "make_session") as ms, patch.object(cg, "MAX_PAGES", 6), patch.object(
+            cg, "MAX_WORKERS", 3
+        ), patch.object(cg, "PAGE_DELAY_RANGE", (0, 0)):
+            ms.return_value = cg.requests.Session()
+            rows = cg.scrape()
+        self.assertEqual(len(rows), 2)
+        # The empty page 2 ends pagination; later batches are never requested
+        self.assertLessEqual(mock_get.call_count, 3)
+
+    @patch("requests.Session.get")
+    def test_scrape_limiter_uses_full_delay_range(self, mock_get):
+        delay_ranges = []
+
+        class RecordingLimiter:
+            def __init__(self, delay_range):
+                self.delay_range = delay_range
+
+            def wait(self, stop=None):
+                delay_ranges.append(self.delay_range)
+                return 0.0
+
+        mock_get.side_effect = lambda url, **kwargs: stub_resp(
+            200, HTML.encode("utf-8") if url.endswith("page=1") else b"<html></html>"
+        )
+        with patch.object(cg, "make_session") as ms, patch.object(cg, "RateLimiter", RecordingLimiter), patch.object(
+            cg, "MAX_PAGES", 4
+        ), patch.object(cg, "MAX_WORKERS", 4), patch.object(cg, "PAGE_DELAY_RANGE", (2.0, 6.0)):
+            ms.return_value = cg.requests.Session()
+            cg.scrape()
+        # Every request waits on one shared budget with the serial per-request delay
+        self.assertTrue(delay_ranges)
+        self.assertEqual(set(delay_ranges), {(2.0, 6.0)})
+
+    @patch("requests.Session.get")
+    def test_scrape_skips_delay_for_cached_pages(self, mock_get):
+        mock_get.return_value = stub_resp(200, HTML.encode("utf-8"), from_cache=True)
+        session = cg.requests.Session()
+        session.cache = object()  # marks a caching session; get() is mocked
+        with patch.object(cg, "make_session", return_value=session), patch.object(cg, "MAX_PAGES", 2), patch.object(
+            cg, "MAX_WORKERS", 1
+        ), patch.object(cg.RateLimiter, "wait") as wait:
+            rows = cg.scrape()
+        self.assertEqual(len(rows), 4)
+        wait.assert_not_called()
+        for call in mock_get.call_args_list:
+            self.assertTrue(call.kwargs.get("only_if_cached"))
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,4 +1,5 @@
 import pathlib
+import time
 import unittest
 from datetime import datetime
 from unittest.mock import patch
@@ -8,11 +9,12 @@ import requests
 
 from utils.url import canonical_url
 
-pytestmark = pytest.mark.live
-
 import scrape_carscom as sc
 
 FIXTURE = pathlib.Path(__file__).parent / "fixtures" / "carscom_page1.html"
+FIXTURE_HTML = FIXTURE.read_text()
+# Parsed once for the whole module; tests only read these rows
+FIXTURE_ROWS = sc.parse_listings(FIXTURE_HTML)
 
 
 @pytest.mark.live
@@ -20,10 +22,8 @@ class CarsComScraperLiveTests(unittest.TestCase):
     """Tests that exercise the cars.com scraper against the live site."""
 
     def test_parse_listings_from_fixture(self):
-        html = FIXTURE.read_text()
-        rows = sc.parse_listings(html)
-        assert rows
-        first = rows[0]
+        assert FIXTURE_ROWS
+        first = FIXTURE_ROWS[0]
         assert first["source"] == "cars.com"
         assert first["title"]
         assert first["url"].startswith("https://www.cars.com/")
@@ -31,9 +31,7 @@ class CarsComScraperLiveTests(unittest.TestCase):
         datetime.fromisoformat(first["first_seen"])
 
     def test_filter_by_config_applies_limits(self):
-        html = FIXTURE.read_text()
-        rows = sc.parse_listings(html)
-        filtered = sc.filter_by_config(rows)
+        filtered = sc.filter_by_config(FIXTURE_ROWS)
         for row in filtered:
             price = row.get("price")
             mileage = row.get("mileage")
@@ -94,3 +92,145 @@ def test_scrape_selenium_fallback():
         rows = sc.scrape()
     assert fs.called
     assert rows
+
+
+def test_scrape_stops_at_first_empty_page():
+    # Pages are fetched concurrently, so answer by page number rather than call order
+    def respond(session, url):
+        return FIXTURE_HTML if "page=1&" in url else "<html></html>"
+
+    with patch.object(sc, "make_session", return_value=object()), patch.object(
+        sc, "fetch_html_requests", side_effect=respond
+    ) as fr, patch.object(sc, "make_driver") as md, patch.object(sc, "MAX_PAGES", 6), patch.object(
+        sc, "MAX_WORKERS", 3
+    ), patch.object(sc, "PAGE_DELAY_RANGE", (0, 0)), patch.object(sc, "USE_SELENIUM", False):
+        rows = sc.scrape()
+    assert len(rows) == len(FIXTURE_ROWS)
+    # The empty page 2 ends pagination; the next window is never requested
+    assert fr.call_count <= 3
+    md.assert_not_called()
+
+
+def test_scrape_stops_when_page_repeats_listings():
+    with patch.object(sc, "make_session", return_value=object()), patch.object(
+        sc, "fetch_html_requests", return_value=FIXTURE_HTML
+    ), patch.object(sc, "make_driver") as md, patch.object(sc, "MAX_PAGES", 6), patch.object(
+        sc, "MAX_WORKERS", 2
+    ), patch.object(sc, "PAGE_DELAY_RANGE", (0, 0)), patch.object(sc, "USE_SELENIUM", False):
+        rows = sc.scrape()
+    # Page 2 repeats page 1 exactly, so only page 1's listings are kept
+    assert len(rows) == len(FIXTURE_ROWS)
+    md.assert_not_called()
+
+
+def test_scrape_spaces_workers_by_full_page_delay():
+    delay_ranges = []
+
+    class RecordingLimiter:
+        def __init__(self, delay_range):
+            self.delay_range = delay_range
+
+        def wait(self, stop=None):
+            delay_ranges.append(self.delay_range)
+            return 0.0
+
+    with patch.object(sc, "make_session", return_value=object()), patch.object(
+        sc, "fetch_html_requests", side_effect=lambda session, url: FIXTURE_HTML if "page=1&" in url else "<html></html>"
+    ), patch.object(sc, "RateLimiter", RecordingLimiter), patch.object(sc, "MAX_PAGES", 4), patch.object(
+        sc, "MAX_WORKERS", 4
+    ), patch.object(sc, "PAGE_DELAY_RANGE", (2.0, 6.0)), patch.object(sc, "USE_SELENIUM", False):
+        sc.scrape()
+    # All workers draw from one budget with the serial per-request delay
+    assert delay_ranges
+    assert set(delay_ranges) == {(2.0, 6.0)}
+
+
+def test_scrape_does_not_wait_out_reserved_slots_after_stop():
+    with patch.object(sc, "make_session", return_value=object()), patch.object(
+        sc, "fetch_html_requests", return_value="<html></html>"
+    ) as fr, patch.object(sc, "MAX_PAGES", 4), patch.object(sc, "MAX_WORKERS", 4), patch.object(
+        sc, "PAGE_DELAY_RANGE", (5.0, 5.0)
+    ), patch.object(sc, "USE_SELENIUM", False), patch.object(sc, "AUTO_SELENIUM_ON_FAIL", False):
+        started = time.monotonic()
+        rows = sc.scrape()
+        elapsed = time.monotonic() - started
+    assert rows == []
+    # Page 1 is empty; pages 2-4 were waiting on 5/10/15 s slots and give up at once
+    assert elapsed < 3
+    assert fr.call_count == 1
+
+
+def test_scrape_reports_each_page_to_callback():
+    pages = []
+    with patch.object(sc, "make_session", return_value=object()), patch.object(
+        sc, "fetch_html_requests", side_effect=lambda session, url: FIXTURE_HTML if "page=1&" in url else "<html></html>"
+    ), patch.object(sc, "MAX_PAGES", 2), patch.object(sc, "MAX_WORKERS", 1), patch.object(
+        sc, "PAGE_DELAY_RANGE", (0, 0)
+    ), patch.object(sc, "USE_SELENIUM", False):
+        rows = sc.scrape(on_page=pages.append)
+    assert pages == [rows]
+
+
+def test_fetch_html_selenium_reuses_cached_page(tmp_path):
+    class DummyDriver:
+        page_source = "<html>cards</html>"
+
+        def __init__(self):
+            self.loads = 0
+
+        def execute_cdp_cmd(self, cmd, params):
+            raise RuntimeError("no CDP")
+
+        def get(self, url):
+            self.loads += 1
+
+        def find_elements(self, by, sel):
+            return []
+
+        def find_element(self, by, sel):
+            return object()
+
+    driver = DummyDriver()
+    with patch.object(sc, "SELENIUM_CACHE_NAME", str(tmp_path / "selenium")), patch.object(sc, "USE_CACHE", True):
+        first = sc.fetch_html_selenium(driver, "https://www.cars.com/shopping/results/?page=1")
+        second = sc.fetch_html_selenium(driver, "https://www.cars.com/shopping/results/?page=1")
+        with patch.object(sc, "CACHE_EXPIRE_AFTER", 0):
+            sc.fetch_html_selenium(driver, "https://www.cars.com/shopping/results/?page=1")
+    assert first == second == DummyDriver.page_source
+    assert driver.loads == 2
+
+
+def test_fetch_html_selenium_rejects_page_that_never_navigates(tmp_path):
+    class StuckDriver:
+        """CDP driver whose navigation never replaces the tagged old document."""
+
+        def __init__(self):
+            self.stale = False
+
+        def execute_cdp_cmd(self, cmd, params):
+            if cmd == "Page.navigate":
+                return {}
+            expr = params["expression"]
+            if expr == "window.__carsStale = true":
+                self.stale = True
+                return {"result": {"value": True}}
+            if expr == sc._NEW_DOCUMENT_JS:
+                return {"result": {"value": not self.stale}}
+            return {"result": {"value": "<html>previous page's cards</html>"}}
+
+        def find_elements(self, by, sel):
+            return []
+
+    with patch.object(sc, "SELENIUM_CACHE_NAME", str(tmp_path / "selenium")), patch.object(
+        sc, "USE_CACHE", True
+    ), patch.object(sc, "SELENIUM_WAIT", 0):
+        html = sc.fetch_html_selenium(StuckDriver(), "https://www.cars.com/shopping/results/?page=2")
+    assert html is None
+    assert sc._selenium_cache_get("https://www.cars.com/shopping/results/?page=2") is None
+
+
+def test_numeric_stats_survives_values_beyond_int64():
+    assert sc._numeric_stats([30000, 10000, 20000]) == (10000, 20000, 20000)
+    # A garbled field can concatenate into a number no int64 can hold
+    assert sc._numeric_stats([2**63, 5000, 7000]) == (5000, 7000, (2**63 + 12000) // 3)
+    assert sc._numeric_stats([]) == (None, None, None)
@@ -1,14 +1,17 @@
+import csv
 import os
 import sys
+import tempfile
 import unittest
 from datetime import datetime
 from pathlib import Path
-from unittest.mock import MagicMock, patch
+from unittest.mock import patch
 
 os.environ.setdefault("CRAIGS_DOMAIN", "philadelphia")
 os.environ.setdefault("CRAIG_CATEGORIES", "both")
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 from utils.url import canonical_url
+from _stubs import stub_resp
 import scrape_craigslist as sc
 
 FIXTURE_PATH = Path(__file__).parent / "fixtures" / "craigslist_page1.html"
@@ -17,8 +20,13 @@ FIXTURE_HTML = FIXTURE_PATH.read_text(encoding="utf-8")
 
 
 class CraigslistScraperTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # Parsed once for the class; tests only read these rows
+        cls.rows = sc.parse_listings(FIXTURE_HTML)
+
     def test_parse_listings_extracts_fields(self):
-        rows = sc.parse_listings(FIXTURE_HTML)
+        rows = self.rows
         self.assertEqual(len(rows), 2)
         first = rows[0]
         self.assertEqual(first["source"], "craigslist")
@@ -31,8 +39,22 @@ class CraigslistScraperTests(unittest.TestCase):
         self.assertEqual(first["url"], canonical_url(first["url"]))
         datetime.fromisoformat(first["first_seen"])
 
+    def test_parse_listings_reads_results_block(self):
+        html = (
+            b'<html><head><script type="application/ld+json" id="ld_searchpage_results">'
+            b'{"itemListElement": [{"item": {"name": "2009 Honda Fit", "url": "/cto/d/fit/1.html?lang=en",'
+            b' "offers": {"price": "4200"}, "address": {"addressLocality": "Camden"}}}]}'
+            b"</script></head><body></body></html>"
+        )
+        rows = sc.parse_listings(html)
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["title"], "2009 Honda Fit")
+        self.assertEqual(rows[0]["price"], 4200)
+        self.assertEqual(rows[0]["location"], "Camden")
+        self.assertEqual(rows[0]["url"], "https://philadelphia.craigslist.org/cto/d/fit/1.html")
+
     def test_filter_by_config_applies_limits(self):
-        rows = sc.parse_listings(FIXTURE_HTML)
+        rows = self.rows
         with patch.object(sc, 'config', autospec=True) as mock_cfg:
             mock_cfg.PRICE_MAX = 4000
             mock_cfg.YEAR_MIN = 2004
@@ -41,23 +63,35 @@ class CraigslistScraperTests(unittest.TestCase):
         self.assertTrue(any("Toyota Camry" in t for t in titles))
         self.assertFalse(any("2002" in t for t in titles))
 
+    def test_write_csv_leaves_missing_fields_blank(self):
+        rows = [{"source": "craigslist", "title": "2010 Honda Civic", "url": "https://x/1.html"}]
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "out", "craigslist_results.csv")
+            sc.write_csv(rows, path)
+            with open(path, newline="", encoding="utf-8") as f:
+                out = list(csv.DictReader(f))
+        self.assertEqual(len(out), 1)
+        self.assertEqual(out[0]["title"], "2010 Honda Civic")
+        self.assertEqual(out[0]["price"], "")
+        self.assertEqual(out[0]["first_seen"], "")
+
+    def test_numeric_stats_survives_values_beyond_int64(self):
+        self.assertEqual(sc._numeric_stats([3000, None, 1000, 2000]), (1000, 2000, 2000))
+        # A garbled price can concatenate into a number no int64 can hold
+        self.assertEqual(sc._numeric_stats([2**63, 5000, None, 7000]), (5000, 7000, (2**63 + 12000) // 3))
+        self.assertEqual(sc._numeric_stats([None]), (None, None, None))
+
     @patch("requests.Session.get")
     def test_scrape_handles_http_errors(self, mock_get):
-        resp = MagicMock()
-        resp.status_code = 500
-        resp.text = ""
-        mock_get.return_value = resp
-        with patch.object(sc, 'make_session') as ms:
+        mock_get.return_value = stub_resp(500)
+        with patch.object(sc, 'make_session') as ms, patch.object(sc, 'PAGE_DELAY_RANGE', (0, 0)):
             ms.return_value = sc.requests.Session()
             rows = sc.scrape()
         self.assertEqual(rows, [])
 
     @patch("requests.Session.get")
     def test_scrape_returns_rows(self, mock_get):
-        resp = MagicMock()
-        resp.status_code = 200
-        resp.text = FIXTURE_HTML
-        mock_get.return_value = resp
+        mock_get.return_value = stub_resp(200, FIXTURE_HTML.encode("utf-8"))
         with patch.object(sc, 'make_session') as ms, patch.object(sc, 'MAX_PAGES', 1), patch.object(sc, 'PAGE_DELAY_RANGE', (0, 0)):
             ms.return_value = sc.requests.Session()
             rows = sc.scrape()
@@ -70,23 +104,42 @@ class CraigslistScraperTests(unittest.TestCase):
 
     @patch("requests.Session.get")
     def test_scrape_stops_when_no_results(self, mock_get):
-        # Sequence:
-        # 1) cto page1 → HTML
-        # 2) cto page2 → empty => stop cto
-        # 3) cta page1 → empty => stop cta
-        resp_cto_html = MagicMock()
-        resp_cto_html.status_code = 200
-        resp_cto_html.text = FIXTURE_HTML
-        resp_empty = MagicMock()
-        resp_empty.status_code = 200
-        resp_empty.text = "<html></html>"
-        mock_get.side_effect = [resp_cto_html, resp_empty, resp_empty]
-        with patch.object(sc, 'make_session') as ms, patch.object(sc, 'MAX_PAGES', 5), patch.object(sc, 'PAGE_DELAY_RANGE', (0, 0)):
+        # Categories are fetched concurrently, so answer by URL:
+        # cto page 1 → HTML; cto page 2 and cta page 1 → empty, ending both
+        resp_cto_html = stub_resp(200, FIXTURE_HTML.encode("utf-8"))
+        resp_empty = stub_resp(200, b"<html></html>")
+        mock_get.side_effect = lambda url, **kw: (
+            resp_cto_html if "/search/cto?" in url and "s=0" in url else resp_empty
+        )
+        with patch.object(sc, 'make_session') as ms, patch.object(sc, 'MAX_PAGES', 5), patch.object(sc, 'PAGE_DELAY_RANGE', (0, 0)), patch.object(sc, 'CRAIG_CATEGORIES', ["cto", "cta"]):
             ms.return_value = sc.requests.Session()
             rows = sc.scrape()
         self.assertEqual(len(rows), 2)
         self.assertEqual(mock_get.call_count, 3)
 
+    @patch("requests.Session.get")
+    def test_scrape_categories_share_one_limiter(self, mock_get):
+        limiters = []
+
+        class RecordingLimiter:
+            def __init__(self, delay_range):
+                self.delay_range = delay_range
+                self.waits = 0
+                limiters.append(self)
+
+            def wait(self, stop=None):
+                self.waits += 1
+                return 0.0
+
+        mock_get.return_value = stub_resp(200, b"<html></html>")
+        with patch.object(sc, 'make_session') as ms, patch.object(sc, 'RateLimiter', RecordingLimiter), patch.object(sc, 'CRAIG_CATEGORIES', ["cto", "cta"]):
+            ms.return_value = sc.requests.Session()
+            sc.scrape()
+        # One budget for the host, spent by both categories' requests
+        self.assertEqual(len(limiters), 1)
+        self.assertEqual(limiters[0].delay_range, sc.PAGE_DELAY_RANGE)
+        self.assertEqual(limiters[0].waits, mock_get.call_count)
+        self.assertEqual(mock_get.call_count, 2)
 
 if __name__ == "__main__":
     unittest.main()
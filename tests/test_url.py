@@ -0,0 +1,19 @@
+import pytest
+
+from utils.url import canonical_url, is_canonical
+
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        ("https://www.cars.com/vehicledetail/123/?attr=1#photos", "https://www.cars.com/vehicledetail/123/"),
+        ("https://x.craigslist.org/cto/d/a/1.html#?s=1", "https://x.craigslist.org/cto/d/a/1.html"),
+        # Normalized the way urlsplit/urlunsplit always have, so merged data still dedupes
+        (" HTTPS://x/a?b", "https://x/a"),
+        ("https://x/a\t?b", "https://x/a"),
+        ("https:////x/a", "https://x/a"),
+    ],
+)
+def test_canonical_url(url, expected):
+    assert canonical_url(url) == expected
+    assert is_canonical(canonical_url(url))
@@ -0,0 +1,25 @@
+import csv
+import os
+from typing import IO, Dict, List, Sequence
+
+# Column order shared by every scraper's results file
+CSV_FIELDS = ("source", "title", "price", "mileage", "dealer", "location", "url", "first_seen")
+
+
+def open_csv(path: str, fields: Sequence[str] = CSV_FIELDS) -> IO[str]:
+    """Create ``path`` for writing rows and write the header line."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Large buffer: the whole file typically goes out in a handful of write() calls
+    f = open(path, "w", newline="", encoding="utf-8", buffering=1 << 20)
+    csv.writer(f).writerow(fields)
+    return f
+
+
+def append_csv(f: IO[str], rows: List[Dict], fields: Sequence[str] = CSV_FIELDS) -> None:
+    # One writerows call over plain tuples; missing fields and None render as ""
+    csv.writer(f).writerows(tuple(r.get(k) for k in fields) for r in rows)
+
+
+def write_csv(rows: List[Dict], path: str) -> None:
+    with open_csv(path) as f:
+        append_csv(f, rows)
@@ -1,5 +1,6 @@
+import os
 import random
-from typing import List
+from typing import List, Optional
 
 import requests
 from requests.adapters import HTTPAdapter
@@ -10,6 +11,19 @@ try:
 except Exception:  # pragma: no cover - fallback if cache not available
     requests_cache = None  # type: ignore
 
+try:  # urllib3 only decodes Brotli responses when one of these is importable
+    import brotli  # noqa: F401
+    HAS_BROTLI = True
+except ImportError:  # pragma: no cover - depends on installed extras
+    try:
+        import brotlicffi  # noqa: F401
+        HAS_BROTLI = True
+    except ImportError:
+        HAS_BROTLI = False
+
+# Accept-Encoding value advertising only codings this environment can decode
+ACCEPT_ENCODING = "br, gzip, deflate" if HAS_BROTLI else "gzip, deflate"
+
 # A small rotation of modern desktop and mobile user agents
 USER_AGENTS: List[str] = [
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/127.0.0.0 Safari/537.36",
@@ -19,10 +33,46 @@ USER_AGENTS: List[str] = [
 ]
 
 
-def make_session(use_cache: bool = False) -> requests.Session:
-    """Create a requests session with retry and optional caching."""
+def cache_enabled_from_env(default: bool = False) -> bool:
+    """Whether the ``REQUESTS_CACHE`` environment variable turns caching on."""
+    value = os.getenv("REQUESTS_CACHE")
+    if value is None:
+        return default
+    return value not in ("0", "false", "False", "")
+
+
+def make_session(
+    use_cache: Optional[bool] = None,
+    pool_size: int = 10,
+    cache_name: str = "http_cache",
+    expire_after: Optional[int] = None,
+    stale_if_error: bool = False,
+    cache_control: bool = False,
+) -> requests.Session:
+    """Create a requests session with retry and optional caching.
+
+    ``use_cache`` defaults to the ``REQUESTS_CACHE`` environment variable (off
+    when unset), so ad-hoc sessions such as the live tests' pick up the same
+    switch as the scrapers.  Keep it unset in CI: cassette replay needs to see
+    the real requests rather than cache hits.
+
+    ``pool_size`` bounds the number of keep-alive connections kept per host and
+    should be at least the number of threads sharing the session; extra threads
+    wait for a pooled connection rather than opening (and then discarding) their
+    own TCP/TLS connection.
+
+    When caching, responses are stored in the SQLite file ``cache_name`` and, if
+    ``expire_after`` (seconds) is given, refetched once they are older than that.
+    ``stale_if_error`` serves an expired copy when the refetch fails, and
+    ``cache_control`` lets server Cache-Control/ETag headers override the expiry.
+    """
+    if use_cache is None:
+        use_cache = cache_enabled_from_env()
     if use_cache and requests_cache:
-        session: requests.Session = requests_cache.CachedSession("http_cache")
+        cache_kwargs = {"stale_if_error": stale_if_error, "cache_control": cache_control}
+        if expire_after is not None:
+            cache_kwargs["expire_after"] = expire_after
+        session: requests.Session = requests_cache.CachedSession(cache_name, **cache_kwargs)
     else:
         session = requests.Session()
 
@@ -32,11 +82,15 @@ def make_session(use_cache: bool = False) -> requests.Session:
     retry = Retry(
         total=4,
         backoff_factor=2,
+        # Spread retries from concurrent workers so they don't land together
+        backoff_jitter=0.5,
         status_forcelist=[429, 500, 502, 503, 504],
         allowed_methods=["HEAD", "GET", "OPTIONS"],
         raise_on_status=False,
     )
-    adapter = HTTPAdapter(max_retries=retry)
+    adapter = HTTPAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size, pool_block=True, max_retries=retry
+    )
     session.mount("https://", adapter)
     session.mount("http://", adapter)
     return session
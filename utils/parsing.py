@@ -0,0 +1,49 @@
+import re
+from typing import Any, Optional
+
+from lxml import etree
+from lxml import html as lxml_html
+
+# Result pages are served as UTF-8; don't let libxml2 guess from bytes
+HTML_PARSER = lxml_html.HTMLParser(encoding="utf-8")
+# Model year leading a listing title, e.g. "2012 Honda Civic"
+YEAR_RE = re.compile(r"\d{4}")
+
+_NON_DIGIT_RE = re.compile(r"\D")
+# Deletes every ASCII non-digit in a single C pass, which beats a regex
+# sub on short strings like "$8,999" or "123,456 mi."
+_DROP_ASCII_NON_DIGITS = str.maketrans("", "", "".join(chr(c) for c in range(128) if not chr(c).isdigit()))
+# Text nodes as bs4's get_text() sees them (script/style bodies excluded)
+_TEXT_XPATH = etree.XPath(".//text()[not(parent::script) and not(parent::style)]")
+
+
+def clean_number(text: Optional[str]) -> Optional[int]:
+    """Return the digits in ``text`` as an int, e.g. ``"$8,999"`` -> ``8999``."""
+    if not text:
+        return None
+    digits = text.translate(_DROP_ASCII_NON_DIGITS)
+    if not digits:
+        return None
+    try:
+        return int(digits)
+    except ValueError:  # non-ASCII leftovers such as a bullet; strip them the slow way
+        digits = _NON_DIGIT_RE.sub("", text)
+        return int(digits) if digits else None
+
+
+def has_class(name: str) -> str:
+    """XPath predicate equivalent to the CSS class selector ``.name``."""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+def first_match(xpath: etree.XPath, el: Any) -> Any:
+    """Return the first node ``xpath`` finds under ``el`` (like bs4's ``select_one``)."""
+    found = xpath(el)
+    return found[0] if found else None
+
+
+def element_text(el: Any, sep: str = "") -> Optional[str]:
+    """Return the stripped text of ``el`` (like bs4's ``get_text(sep, strip=True)``)."""
+    if el is None:
+        return None
+    return sep.join(t for t in (t.strip() for t in _TEXT_XPATH(el)) if t)
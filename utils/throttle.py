@@ -3,11 +3,12 @@
 from __future__ import annotations
 
 import random
+import threading
 import time
-from typing import Tuple
+from typing import Optional, Tuple
 
 
-def polite_sleep(delay_range: Tuple[float, float]) -> float:
+def polite_sleep(delay_range: Tuple[float, float], since: Optional[float] = None) -> float:
     """Sleep for a random interval within ``delay_range``.
 
     Parameters
@@ -15,6 +16,11 @@ def polite_sleep(delay_range: Tuple[float, float]) -> float:
     delay_range:
         Two-tuple of ``(min_seconds, max_seconds)`` representing the
         inclusive bounds for a random sleep duration.
+    since:
+        Optional :func:`time.monotonic` timestamp the interval is measured
+        from, typically taken just before the request.  Time already spent
+        since then (waiting on the response, parsing) counts towards the
+        delay, so only the remainder is slept.
 
     Returns
     -------
@@ -22,5 +28,48 @@ def polite_sleep(delay_range: Tuple[float, float]) -> float:
         The actual number of seconds slept.
     """
     delay = random.uniform(*delay_range)
-    time.sleep(delay)
-    return delay
+    if since is not None:
+        delay -= time.monotonic() - since
+    if delay > 0:
+        time.sleep(delay)
+    return max(delay, 0.0)
+
+
+class RateLimiter:
+    """Space out calls shared by several threads.
+
+    Each call to :meth:`wait` reserves the next free slot and sleeps until it
+    arrives, then pushes the following slot back by a random interval within
+    ``delay_range``.  Callers therefore start at most one request per interval
+    on average, however many threads share the limiter, and the wait overlaps
+    with other threads' in-flight requests instead of blocking the caller's
+    main loop.
+
+    Parameters
+    ----------
+    delay_range:
+        Two-tuple of ``(min_seconds, max_seconds)`` between consecutive slots.
+    """
+
+    def __init__(self, delay_range: Tuple[float, float]) -> None:
+        self.delay_range = delay_range
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self, stop: Optional[threading.Event] = None) -> float:
+        """Block until this caller's slot; return the seconds slept.
+
+        If ``stop`` is given, the wait ends as soon as it is set, so callers
+        that are no longer needed don't sit out their reserved slot.
+        """
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + random.uniform(*self.delay_range)
+        delay = start - now
+        if delay > 0:
+            if stop is not None:
+                stop.wait(delay)
+            else:
+                time.sleep(delay)
+        return delay
@@ -1,6 +1,15 @@
+from functools import lru_cache
 from urllib.parse import urlsplit, urlunsplit
 
 
+def is_canonical(url: str) -> bool:
+    """Return True if ``url`` has no query or fragment left to strip."""
+    # Two C-level substring scans beat any single-pass trick on URL-length strings
+    return "?" not in url and "#" not in url
+
+
+# Pure function of a string; listings repeat across pages and categories
+@lru_cache(maxsize=1 << 16)
 def canonical_url(url: str) -> str:
     """Return ``url`` without query parameters or fragments.
 
@@ -14,5 +23,22 @@ def canonical_url(url: str) -> str:
     str
         The canonicalized URL containing only scheme, netloc, and path.
     """
+    # Ordinary absolute http(s) URLs come back from urlsplit/urlunsplit as the
+    # text before any '?' or '#', so plain partitions skip the full parse and
+    # rebuild.  Anything urlsplit would normalize or reject (scheme case,
+    # surrounding whitespace, control or non-ASCII characters, an empty host,
+    # brackets) takes the full path so results stay identical.
+    if (
+        url.startswith(("https://", "http://"))
+        and url[-1] != " "
+        and url.isascii()
+        and url.isprintable()
+    ):
+        # A fragment may itself contain '?', so drop it before the query
+        base, _, _ = url.partition("#")
+        base, _, _ = base.partition("?")
+        _, _, rest = base.partition("//")
+        if rest[:1] not in ("", "/") and "[" not in rest and "]" not in rest:
+            return base
     parts = urlsplit(url)
     return urlunsplit((parts.scheme, parts.netloc, parts.path, "", ""))